@@ -3,15 +3,209 @@
 This implementation uses the AzureOpenAI client with automatic token refresh
 via Azure managed identity, eliminating the need for API key management.
 """
-from typing import Dict, Any
-from openai import AzureOpenAI
-import json
-from azure.identity import DefaultAzureCredential, get_bearer_token_provider
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Any, Optional, Union
+from openai import AsyncAzureOpenAI
+from pydantic import ValidationError
+import asyncio
+import functools
+import httpx
+import logging
+import re
+import threading
+import time
+import ijson
+import orjson
+from azure.core.credentials import AccessToken
+from azure.identity import DefaultAzureCredential
 
 from app.config import settings
+from app.llm_cache import make_cache_key, get_cached_response, store_response
 from app.utils import assign_weekdays_to_workouts
-from app.prompts import SYSTEM_PROMPT, build_user_prompt
-from app.models import WorkoutRequest, TrainingProgram
+from app.prompts import (
+    SYSTEM_PROMPT,
+    WEEK_SYSTEM_PROMPT,
+    RACE_DISTANCES,
+    build_user_prompt,
+    build_week_prompt,
+)
+from app.models import WorkoutRequest, TrainingProgram, WeekPlan
+
+logger = logging.getLogger(__name__)
+
+# Programs too long for one call are generated in per-phase batches of at most
+# this many weeks.
+MAX_WEEKS_PER_BATCH = 6
+
+# Output token budgets. A larger max_output_tokens slows responses even when
+# fewer tokens are produced, so requests are sized to the expected output.
+MODEL_MAX_OUTPUT_TOKENS = 16000
+PROGRAM_TOKEN_OVERHEAD = 1500
+EST_TOKENS_PER_WEEK = 1100
+WEEK_MAX_OUTPUT_TOKENS = 1200
+# Spare output budget for single-call programs whose weeks run longer than estimated.
+SINGLE_CALL_TOKEN_MARGIN = 2000
+# Reasoning models count hidden reasoning tokens against max_completion_tokens,
+# so their budgets get this much extra on top of the expected visible output.
+REASONING_TOKEN_ALLOWANCE = 4000
+
+AZURE_OPENAI_API_VERSION = "2024-10-21"  # Use a stable API version
+
+COGNITIVE_SERVICES_SCOPE = "https://cognitiveservices.azure.com/.default"
+# Refresh the Entra ID token once it is within this many seconds of expiry.
+TOKEN_REFRESH_MARGIN_SECONDS = 300
+
+# Process-wide credential and token, shared by every agent instance.
+_credential: Optional[DefaultAzureCredential] = None
+_cached_token: Optional[AccessToken] = None
+_credential_lock = threading.Lock()
+
+# Request parameters each deployment accepts, keyed by (endpoint, deployment, api_version).
+# Starts optimistic and is narrowed the first time a call is rejected, so the
+# error-driven retries happen at most once per deployment per process.
+_capabilities: dict[tuple[str, str, str], dict[str, Any]] = {}
+
+# Model families known to accept response_format={"type": "json_object"}.
+JSON_MODE_MODELS = frozenset({
+    "gpt-4o", "gpt-4o-mini", "gpt-4-turbo",
+    "gpt-4.1", "gpt-4.1-mini", "gpt-4.1-nano",
+    "gpt-5", "gpt-5-mini", "gpt-5-nano",
+    "o3-mini", "o4-mini",
+})
+# Families known to reject it; any other deployment is probed on its first call.
+_NON_JSON_MODE_MODELS = frozenset({"gpt-4", "gpt-4-32k"})
+# Families that spend output tokens on reasoning (see REASONING_TOKEN_ALLOWANCE).
+REASONING_MODELS = frozenset({
+    "gpt-5", "gpt-5-mini", "gpt-5-nano",
+    "o3-mini", "o4-mini",
+})
+
+# First "{" through the last "}"; skips markdown fences and leading/trailing chatter.
+_JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+
+def _get_credential() -> DefaultAzureCredential:
+    """Get the process-wide DefaultAzureCredential, creating it on first use."""
+    global _credential
+    if _credential is None:
+        with _credential_lock:
+            if _credential is None:
+                _credential = DefaultAzureCredential(
+                    managed_identity_client_id=settings.azure_ai_managed_identity_client_id
+                )
+    return _credential
+
+
+def _token_is_fresh(token: Optional[AccessToken]) -> bool:
+    return token is not None and token.expires_on - time.time() > TOKEN_REFRESH_MARGIN_SECONDS
+
+
+def _refresh_token() -> str:
+    """Fetch a new Azure OpenAI token unless another thread already did."""
+    global _cached_token
+    credential = _get_credential()
+    with _credential_lock:
+        if not _token_is_fresh(_cached_token):
+            _cached_token = credential.get_token(COGNITIVE_SERVICES_SCOPE)
+        return _cached_token.token
+
+
+async def _get_azure_ad_token() -> str:
+    """Token provider for AsyncAzureOpenAI; only touches the credential near expiry."""
+    token = _cached_token
+    if _token_is_fresh(token):
+        return token.token
+    # Token acquisition is blocking I/O (managed identity endpoint), keep it off the event loop.
+    return await asyncio.to_thread(_refresh_token)
+
+
+@functools.lru_cache(maxsize=64)
+def _phase_schedule(total_weeks: int) -> tuple[tuple[str, int], ...]:
+    """Split a program into periodization phases as (phase name, weeks)."""
+    base_weeks = int(total_weeks * 0.6)
+    build_weeks = int(total_weeks * 0.25)
+    peak_weeks = max(1, int(total_weeks * 0.1))
+    taper_weeks = total_weeks - base_weeks - build_weeks - peak_weeks
+    return (
+        ("Base", base_weeks),
+        ("Build", build_weeks),
+        ("Peak", peak_weeks),
+        ("Taper", taper_weeks),
+    )
+
+
+def _estimate_program_tokens(duration_weeks: int) -> int:
+    """Output token budget for a single-call program of `duration_weeks` weeks."""
+    return min(MODEL_MAX_OUTPUT_TOKENS, PROGRAM_TOKEN_OVERHEAD + duration_weeks * EST_TOKENS_PER_WEEK)
+
+
+def _needs_progressive(duration_weeks: int) -> bool:
+    """Whether a program is too long to generate reliably in a single call."""
+    return (
+        PROGRAM_TOKEN_OVERHEAD + duration_weeks * EST_TOKENS_PER_WEEK
+        > MODEL_MAX_OUTPUT_TOKENS - SINGLE_CALL_TOKEN_MARGIN
+    )
+
+
+def _resolve_race_distance(request: WorkoutRequest) -> str:
+    """Human-readable race description for the request's goal."""
+    goal_value = request.goal.value if hasattr(request.goal, 'value') else request.goal
+    return RACE_DISTANCES.get(goal_value, goal_value)
+
+
+@functools.lru_cache(maxsize=16)
+def _model_family_from_deployment(deployment_name: str) -> Optional[str]:
+    """Guess the model family from a deployment name, e.g. "prod-gpt-4o-mini" -> "gpt-4o-mini"."""
+    name = deployment_name.lower()
+    # Longest first, so "gpt-4o-mini" wins over "gpt-4o" and "gpt-4".
+    for family in sorted(JSON_MODE_MODELS | _NON_JSON_MODE_MODELS, key=len, reverse=True):
+        if family in name:
+            return family
+    return None
+
+
+def _learn_capabilities(caps: dict[str, Any], message: str, kwargs: dict[str, Any]) -> bool:
+    """Update `caps` from a rejected request. Returns False if the error is not a capability issue."""
+    if "Unsupported value" in message and "temperature" in message and "temperature" in kwargs:
+        caps["supports_temperature"] = False
+        return True
+    if (
+        "response_format" in kwargs
+        and ("Unsupported parameter" in message or "Unrecognized request argument" in message)
+        and "response_format" in message
+    ):
+        caps["supports_json_mode"] = False
+        return True
+    # Decide from what this request sent, not the shared caps: concurrent first
+    # calls may already have switched token_param and still need their retry.
+    if "Unsupported parameter" in message:
+        if "max_completion_tokens" in kwargs and "max_completion_tokens" in message:
+            caps["token_param"] = "max_tokens"
+            return True
+        if "max_tokens" in kwargs and "max_tokens" in message:
+            caps["token_param"] = "max_completion_tokens"
+            return True
+    return False
+
+
+@dataclass(frozen=True)
+class GeneratedProgram:
+    """A generated program together with its JSON, serialized once for the cache and the database."""
+    program: TrainingProgram
+    program_json: bytes
+
+
+def _generated_from_cache(cached: str) -> GeneratedProgram:
+    """Rebuild a generated program from its cached JSON."""
+    return GeneratedProgram(TrainingProgram.model_validate_json(cached), cached.encode("utf-8"))
+
+
+async def _store_generated(cache_key: str, program: TrainingProgram) -> GeneratedProgram:
+    """Serialize a freshly generated program and store it in the LLM cache."""
+    # UTF-8 bytes straight from pydantic-core, reused when the program is saved
+    program_json = program.__pydantic_serializer__.to_json(program)
+    await store_response(cache_key, program_json.decode("utf-8"))
+    return GeneratedProgram(program, program_json)
 
 
 class TriathlonWorkoutAgentAzureAI:
@@ -29,30 +223,31 @@ class TriathlonWorkoutAgentAzureAI:
         elif base_endpoint.endswith('/openai'):
             base_endpoint = base_endpoint[:-7]
 
+        # One pooled HTTP client for all model calls so TCP/TLS connections are reused
+        # across requests instead of being capped by the SDK's default pool limits.
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        )
+
         auth_mode = (settings.azure_ai_auth or "api_key").lower().strip()
         if auth_mode in {"entra_id", "aad", "managed_identity", "mi"}:
-            # v1 API with managed identity using get_bearer_token_provider
-            token_provider = get_bearer_token_provider(
-                DefaultAzureCredential(
-                    managed_identity_client_id=settings.azure_ai_managed_identity_client_id
-                ),
-                "https://cognitiveservices.azure.com/.default"
-            )
-            
-            self.client = AzureOpenAI(
+            # Managed identity with a process-wide credential and cached token
+            self.client = AsyncAzureOpenAI(
                 azure_endpoint=base_endpoint,
-                azure_ad_token_provider=token_provider,
-                api_version="2024-10-21",  # Use a stable API version
+                azure_ad_token_provider=_get_azure_ad_token,
+                api_version=AZURE_OPENAI_API_VERSION,
+                http_client=http_client,
             )
         else:
             if not settings.azure_ai_api_key:
                 raise ValueError(
                     "AZURE_AI_API_KEY is required when AZURE_AI_AUTH=api_key"
                 )
-            self.client = AzureOpenAI(
+            self.client = AsyncAzureOpenAI(
                 azure_endpoint=base_endpoint,
                 api_key=settings.azure_ai_api_key,
-                api_version="2024-10-21",
+                api_version=AZURE_OPENAI_API_VERSION,
+                http_client=http_client,
             )
 
         if not settings.azure_ai_deployment_name:
@@ -60,8 +255,12 @@ class TriathlonWorkoutAgentAzureAI:
                 "AZURE_AI_DEPLOYMENT_NAME is required when LLM_PROVIDER=azure_ai"
             )
         self.deployment_name = settings.azure_ai_deployment_name
+        self._capability_key = (base_endpoint, self.deployment_name, AZURE_OPENAI_API_VERSION)
+
+        # Bounds concurrent week-generation calls so we stay within the deployment's TPM quota.
+        self._semaphore = asyncio.Semaphore(settings.azure_ai_max_concurrent_requests)
 
-    def _create_chat_completion(
+    async def _create_chat_completion(
         self,
         *,
         messages: list[dict[str, str]],
@@ -72,106 +271,220 @@ class TriathlonWorkoutAgentAzureAI:
         """Create a chat completion with cross-model token-parameter compatibility.
 
         Some newer models (including GPT-5 family) require `max_completion_tokens`
-        instead of `max_tokens`.
+        instead of `max_tokens`. Parameters a deployment rejects are remembered in
+        `_capabilities`, so later calls go straight to the accepted form. Returns a
+        streaming response; use `_collect_stream` to assemble the text.
         """
 
-        common_kwargs: dict[str, Any] = {
-            "model": self.deployment_name,
-            "messages": messages,
-        }
-
-        # When supported, JSON mode makes the model return a single JSON object.
-        if json_object:
-            common_kwargs["response_format"] = {"type": "json_object"}
-
-        # Some models only support the default temperature (1) and reject any explicit value.
-        if temperature is not None:
-            common_kwargs["temperature"] = temperature
-
-        def _call_with_max_completion_tokens(kwargs: dict[str, Any]):
-            return self.client.chat.completions.create(
-                **kwargs,
-                max_completion_tokens=max_output_tokens,
+        caps = _capabilities.get(self._capability_key)
+        if caps is None:
+            family = _model_family_from_deployment(self.deployment_name)
+            caps = _capabilities.setdefault(
+                self._capability_key,
+                {
+                    "token_param": "max_completion_tokens",
+                    "supports_temperature": True,
+                    # Without JSON mode we rely on _extract_json_object_text.
+                    "supports_json_mode": family is None or family in JSON_MODE_MODELS,
+                    "reasoning_token_allowance": (
+                        REASONING_TOKEN_ALLOWANCE if family in REASONING_MODELS else 0
+                    ),
+                },
             )
 
-        def _call_with_max_tokens(kwargs: dict[str, Any]):
-            return self.client.chat.completions.create(
-                **kwargs,
-                max_tokens=max_output_tokens,
-            )
+        # Each rejected call narrows `caps`, so a few attempts cover every combination.
+        for attempt in range(4):
+            kwargs: dict[str, Any] = {
+                "model": self.deployment_name,
+                "messages": messages,
+                "stream": True,
+                caps["token_param"]: max_output_tokens + caps["reasoning_token_allowance"],
+            }
+            # When supported, JSON mode makes the model return a single JSON object.
+            if json_object and caps["supports_json_mode"]:
+                kwargs["response_format"] = {"type": "json_object"}
+            # Some models only support the default temperature (1) and reject any explicit value.
+            if temperature is not None and caps["supports_temperature"]:
+                kwargs["temperature"] = temperature
 
-        effective_kwargs = common_kwargs
-
-        try:
-            return _call_with_max_completion_tokens(effective_kwargs)
-        except Exception as exc:  # pragma: no cover
-            message = str(exc)
-
-            # Retry without temperature if the model only accepts default temperature.
-            if "Unsupported value" in message and "temperature" in message:
-                effective_kwargs = dict(effective_kwargs)
-                effective_kwargs.pop("temperature", None)
-                try:
-                    return _call_with_max_completion_tokens(effective_kwargs)
-                except Exception as exc2:  # pragma: no cover
-                    message = str(exc2)
-
-            # Retry without JSON mode if the model/endpoint doesn't support it.
-            if (
-                "response_format" in effective_kwargs
-                and ("Unsupported parameter" in message or "Unrecognized request argument" in message)
-                and "response_format" in message
-            ):
-                effective_kwargs = dict(effective_kwargs)
-                effective_kwargs.pop("response_format", None)
-                return _call_with_max_completion_tokens(effective_kwargs)
-
-            if "Unsupported parameter" in message and "max_completion_tokens" in message:
-                return _call_with_max_tokens(effective_kwargs)
-            if "Unsupported parameter" in message and "max_tokens" in message:
-                return _call_with_max_completion_tokens(effective_kwargs)
-            raise
+            try:
+                return await self.client.chat.completions.create(**kwargs)
+            except Exception as exc:  # pragma: no cover
+                if attempt == 3 or not _learn_capabilities(caps, str(exc), kwargs):
+                    raise
+                logger.info(f"Deployment {self.deployment_name} capabilities updated: {caps}")
     
+    async def _collect_stream(self, stream) -> tuple[str, str | None]:
+        """Concatenate streamed content deltas and return (content, finish_reason)."""
+        parts: list[str] = []
+        finish_reason = None
+        async for chunk in stream:
+            # Azure sends a leading chunk with prompt filter results and no choices.
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            if choice.delta is not None and choice.delta.content:
+                parts.append(choice.delta.content)
+            if choice.finish_reason is not None:
+                finish_reason = choice.finish_reason
+        return "".join(parts), finish_reason
+
     def _extract_json_object_text(self, content: str) -> str:
         """Extract JSON from response, removing markdown and extra text."""
         content = (content or "").strip()
 
-        # Remove markdown code blocks if present.
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0].strip()
-        elif "```" in content:
-            content = content.split("```", 1)[1].split("```")[0].strip()
+        # Fast path: JSON mode responses are already a bare object.
+        if content[:1] == "{" and content[-1:] == "}":
+            return content
 
-        # If there's leading/trailing chatter, extract the first JSON object.
-        first_brace = content.find("{")
-        last_brace = content.rfind("}")
-        if first_brace != -1 and last_brace != -1 and last_brace > first_brace:
-            content = content[first_brace : last_brace + 1]
-
-        return content
+        match = _JSON_OBJECT_RE.search(content)
+        return match.group(0) if match else content
     
-    def generate_program(self, request: WorkoutRequest) -> TrainingProgram:
+    async def generate_program(self, request: WorkoutRequest) -> GeneratedProgram:
         """Generate a complete training program using Azure AI."""
-        # For longer programs (>6 weeks), generate week-by-week to avoid token limits
-        if request.duration_weeks > 6:
-            return self._generate_program_progressive(request)
+        cache_key = make_cache_key(
+            "program", request.model_dump(mode="json"), model=self.deployment_name
+        )
+        cached = await get_cached_response(cache_key)
+        if cached is not None:
+            return _generated_from_cache(cached)
+        
+        # For longer programs, generate in per-phase batches to avoid token limits
+        if _needs_progressive(request.duration_weeks):
+            program = await self._generate_program_progressive(
+                request, _resolve_race_distance(request)
+            )
+        else:
+            program = await self._generate_program_single_call(request)
+        
+        return await _store_generated(cache_key, program)
+    
+    async def stream_program(
+        self, request: WorkoutRequest
+    ) -> AsyncIterator[Union[WeekPlan, GeneratedProgram]]:
+        """Generate a program, yielding each `WeekPlan` as soon as it is available.
+
+        The final item is always the complete, validated program as a
+        `GeneratedProgram`. Weeks from progressive generation may arrive out of order.
+        """
+        cache_key = make_cache_key(
+            "program", request.model_dump(mode="json"), model=self.deployment_name
+        )
+        cached = await get_cached_response(cache_key)
+        if cached is not None:
+            generated = _generated_from_cache(cached)
+            for week in generated.program.weeks:
+                yield week
+            yield generated
+            return
+        
+        if _needs_progressive(request.duration_weeks):
+            program = None
+            async for item in self._stream_program_progressive(
+                request, _resolve_race_distance(request)
+            ):
+                if isinstance(item, TrainingProgram):
+                    program = item
+                else:
+                    yield item
+        else:
+            program = None
+            async for item in self._stream_program_single_call(request):
+                if isinstance(item, TrainingProgram):
+                    program = item
+                else:
+                    yield item
         
-        response = self._create_chat_completion(
+        yield await _store_generated(cache_key, program)
+    
+    async def _create_program_completion(self, request: WorkoutRequest):
+        """Start the streaming completion for a whole program in one call."""
+        return await self._create_chat_completion(
             messages=[
                 {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": build_user_prompt(request, concise=True)},
             ],
             temperature=None,
-            max_output_tokens=16000,
+            max_output_tokens=_estimate_program_tokens(request.duration_weeks),
             json_object=True,
         )
+    
+    async def _generate_program_single_call(self, request: WorkoutRequest) -> TrainingProgram:
+        """Generate the whole program in one model call (short programs)."""
+        stream = await self._create_program_completion(request)
+        raw_content, finish_reason = await self._collect_stream(stream)
+        return self._parse_program(request, raw_content, finish_reason)
+    
+    async def _stream_program_single_call(
+        self, request: WorkoutRequest
+    ) -> AsyncIterator[Union[WeekPlan, TrainingProgram]]:
+        """Single-call generation that parses `weeks` incrementally while tokens stream in.
 
-        choice = response.choices[0]
-        raw_content = getattr(choice.message, "content", None)
-        finish_reason = getattr(choice, "finish_reason", None)
-
+        Completed weeks are yielded as soon as their closing brace arrives. The
+        full response is still parsed and validated at the end, so any
+        incremental parse problem simply falls back to the regular path.
+        """
+        stream = await self._create_program_completion(request)
+        
+        parts: list[str] = []
+        finish_reason = None
+        parsed_weeks = ijson.sendable_list()
+        parser = ijson.items_coro(parsed_weeks, "weeks.item", use_float=True)
+        started = False
+        
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            if choice.finish_reason is not None:
+                finish_reason = choice.finish_reason
+            delta = choice.delta.content if choice.delta is not None else None
+            if not delta:
+                continue
+            parts.append(delta)
+            if parser is None:
+                continue
+            
+            # Skip any markdown fence or chatter before the JSON object starts.
+            if not started:
+                brace = delta.find("{")
+                if brace == -1:
+                    continue
+                delta = delta[brace:]
+                started = True
+            
+            try:
+                parser.send(delta.encode("utf-8"))
+            except Exception as e:
+                # Typically trailing text after the object (e.g. a closing fence).
+                logger.info(f"Incremental week parsing stopped, using full parse: {e}")
+                parser = None
+            
+            completed_weeks = list(parsed_weeks)
+            del parsed_weeks[:]
+            for week_data in completed_weeks:
+                try:
+                    week_data = assign_weekdays_to_workouts({"weeks": [week_data]})["weeks"][0]
+                    week = WeekPlan.model_validate(week_data)
+                except Exception as e:
+                    logger.info(f"Incremental week validation failed, using full parse: {e}")
+                    parser = None
+                    break
+                yield week
+        
+        yield self._parse_program(request, "".join(parts), finish_reason)
+    
+    def _parse_program(
+        self, request: WorkoutRequest, raw_content: str, finish_reason: str | None
+    ) -> TrainingProgram:
+        """Validate a complete single-call program response."""
         # Extract the JSON from the response
         content = self._extract_json_object_text(raw_content or "")
+        # Roughly 4 chars per token; used to calibrate EST_TOKENS_PER_WEEK.
+        logger.debug(
+            f"Program response: {len(content)} chars for {request.duration_weeks} weeks "
+            f"(budget {_estimate_program_tokens(request.duration_weeks)} tokens)"
+        )
 
         if not content.strip():
             raise ValueError(
@@ -186,14 +499,23 @@ class TriathlonWorkoutAgentAzureAI:
                 f"Model hit token limit (finish_reason='length'). "
                 f"Received {len(content)} chars but JSON may be incomplete. "
                 f"Try: 1) Reduce duration_weeks (currently {request.duration_weeks}), "
-                f"2) Increase max_output_tokens (currently 16000), "
+                f"2) Increase EST_TOKENS_PER_WEEK (output budget was "
+                f"{_estimate_program_tokens(request.duration_weeks)} tokens), "
                 f"or 3) Use a model with larger output capacity."
             )
         
+        # Fast path: parse and validate in a single pass in pydantic-core. This only
+        # fails if weekdays still need assigning or the output is invalid; the dict
+        # path below then fixes the days up or reports the error.
+        try:
+            return TrainingProgram.model_validate_json(content)
+        except ValidationError:
+            pass
+        
         # Parse JSON and validate with Pydantic
         try:
-            program_data = json.loads(content)
-        except json.JSONDecodeError as exc:
+            program_data = orjson.loads(content)
+        except orjson.JSONDecodeError as exc:
             preview = content[:800].replace("\n", "\\n")
             raise ValueError(
                 "Model did not return valid JSON. "
@@ -203,120 +525,212 @@ class TriathlonWorkoutAgentAzureAI:
         # Auto-assign weekdays if the AI didn't provide them
         program_data = assign_weekdays_to_workouts(program_data)
         
-        program = TrainingProgram(**program_data)
+        program = TrainingProgram.model_validate(program_data)
         
         return program
     
-    def _generate_program_progressive(self, request: WorkoutRequest) -> TrainingProgram:
-        """Generate a program week-by-week for longer training plans."""
-        from app.models import WeekPlan
-        from app.prompts import RACE_DISTANCES
-        
-        # Determine periodization phases
-        total_weeks = request.duration_weeks
-        base_weeks = int(total_weeks * 0.6)
-        build_weeks = int(total_weeks * 0.25)
-        peak_weeks = max(1, int(total_weeks * 0.1))
-        taper_weeks = total_weeks - base_weeks - build_weeks - peak_weeks
-        
-        weeks = []
+    def _progressive_batch_tasks(
+        self, request: WorkoutRequest, race_distance: str
+    ) -> list[asyncio.Task]:
+        """Start one generation task per batch of consecutive same-phase weeks, in schedule order."""
+        tasks = []
         week_num = 1
-        
-        # Generate each week
-        for phase_name, phase_weeks in [
-            ("Base", base_weeks),
-            ("Build", build_weeks),
-            ("Peak", peak_weeks),
-            ("Taper", taper_weeks)
-        ]:
-            for i in range(phase_weeks):
-                week_data = self.generate_single_week(
+        for phase_name, phase_weeks in _phase_schedule(request.duration_weeks):
+            for offset in range(0, phase_weeks, MAX_WEEKS_PER_BATCH):
+                count = min(MAX_WEEKS_PER_BATCH, phase_weeks - offset)
+                tasks.append(asyncio.ensure_future(
+                    self._generate_phase_weeks(
+                        request, week_num, count, phase_name, race_distance
+                    )
+                ))
+                week_num += count
+        return tasks
+    
+    async def _generate_phase_weeks(
+        self,
+        request: WorkoutRequest,
+        first_week: int,
+        count: int,
+        phase: str,
+        race_distance: str
+    ) -> list[WeekPlan]:
+        """Generate `count` consecutive weeks in one call, falling back to one call per week."""
+        async def _generate_week(week_number: int) -> WeekPlan:
+            async with self._semaphore:
+                week_data = await self.generate_single_week(
                     request=request,
-                    week_number=week_num,
-                    phase=phase_name
+                    week_number=week_number,
+                    phase=phase,
+                    race_distance=race_distance
+                )
+            return WeekPlan(**week_data)
+        
+        if count > 1:
+            try:
+                async with self._semaphore:
+                    week_results = await self._generate_week_batch(
+                        request, first_week, count, phase, race_distance
+                    )
+                return [WeekPlan(**week_data) for week_data in week_results]
+            except Exception as e:
+                logger.warning(
+                    f"Batch generation of weeks {first_week}-{first_week + count - 1} failed, "
+                    f"generating them one by one: {e}"
                 )
-                weeks.append(WeekPlan(**week_data))
-                week_num += 1
         
-        # Build complete program
-        program = TrainingProgram(
+        return list(await asyncio.gather(
+            *(_generate_week(first_week + i) for i in range(count))
+        ))
+    
+    def _assemble_progressive_program(
+        self, request: WorkoutRequest, weeks: list[WeekPlan]
+    ) -> TrainingProgram:
+        """Combine individually generated weeks into the complete program."""
+        (_, base_weeks), (_, build_weeks), (_, peak_weeks), (_, taper_weeks) = (
+            _phase_schedule(request.duration_weeks)
+        )
+        return TrainingProgram(
             goal=request.goal,
             fitness_level=request.fitness_level,
             duration_weeks=request.duration_weeks,
-            weeks=weeks,
+            weeks=sorted(weeks, key=lambda week: week.week_number),
             notes=f"{request.duration_weeks}-week {request.goal.value} program with {base_weeks}w base, {build_weeks}w build, {peak_weeks}w peak, {taper_weeks}w taper phases"
         )
-        
-        return program
     
-    def generate_single_week(
+    async def _generate_program_progressive(
+        self, request: WorkoutRequest, race_distance: str
+    ) -> TrainingProgram:
+        """Generate a program in per-phase batches of weeks for longer training plans."""
+        tasks = self._progressive_batch_tasks(request, race_distance)
+        try:
+            batch_results = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        weeks = [week for batch in batch_results for week in batch]
+        return self._assemble_progressive_program(request, weeks)
+    
+    async def _stream_program_progressive(
+        self, request: WorkoutRequest, race_distance: str
+    ) -> AsyncIterator[Union[WeekPlan, TrainingProgram]]:
+        """Progressive generation that yields weeks as soon as their batch call finishes."""
+        tasks = self._progressive_batch_tasks(request, race_distance)
+        weeks = []
+        try:
+            for next_batch in asyncio.as_completed(tasks):
+                for week in await next_batch:
+                    weeks.append(week)
+                    yield week
+        finally:
+            for task in tasks:
+                task.cancel()
+        yield self._assemble_progressive_program(request, weeks)
+    
+    async def generate_single_week(
         self, 
         request: WorkoutRequest,
         week_number: int,
-        phase: str
+        phase: str,
+        race_distance: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Generate a single week of training (useful for ongoing programs)."""
-        from app.prompts import RACE_DISTANCES
+        """Generate a single week of training (useful for ongoing programs).
+
+        `race_distance` may be passed pre-resolved when generating many weeks of one program.
+        """
+        cache_key = make_cache_key(
+            "week",
+            request.model_dump(mode="json"),
+            model=self.deployment_name,
+            week_number=week_number,
+            phase=phase,
+        )
+        cached = await get_cached_response(cache_key)
+        if cached is not None:
+            return orjson.loads(cached)
         
-        goal_value = request.goal.value if hasattr(request.goal, 'value') else request.goal
-        race_distance = RACE_DISTANCES.get(goal_value, goal_value)
+        # Only this short message varies per call; WEEK_SYSTEM_PROMPT is the cacheable prefix.
+        if race_distance is None:
+            race_distance = _resolve_race_distance(request)
+        prompt = build_week_prompt(request, week_number, week_number, phase, race_distance)
+        week_data = await self._request_week_json(prompt, max_output_tokens=WEEK_MAX_OUTPUT_TOKENS)
         
-        prompt = f"""Create Week {week_number} of a {request.duration_weeks}-week {race_distance} training program.
-
-**Phase**: {phase}
-**Fitness Level**: {request.fitness_level.value}
-**Available Hours**: {request.available_hours_per_week} hours/week
-
-Return a JSON object with this structure (be CONCISE in descriptions):
-```json
-{{
-  "week_number": {week_number},
-  "focus": "{phase} Training",
-  "workouts": [
-    {{
-      "sport": "swim|bike|run",
-      "title": "Brief title",
-      "total_duration_minutes": 60,
-      "total_distance_km": 5.0,
-      "warmup": "Brief description",
-      "main_set": [
-        {{
-          "duration_minutes": 30,
-          "distance_km": 3.0,
-          "intensity": "Zone 2",
-          "description": "Brief description"
-        }}
-      ],
-      "cooldown": "Brief description",
-      "notes": "Brief notes"
-    }}
-  ],
-  "weekly_volume_hours": 6.5,
-  "weekly_distance_km": 45.0
-}}
-```
-
-Create 5-6 workouts. Include swim, bike, run. Keep descriptions under 10 words. Return ONLY valid JSON.
-"""
+        # Auto-assign weekdays if missing
+        week_data = assign_weekdays_to_workouts({"weeks": [week_data]})["weeks"][0]
+        
+        await store_response(cache_key, orjson.dumps(week_data).decode("utf-8"))
+        return week_data
+    
+    async def _generate_week_batch(
+        self,
+        request: WorkoutRequest,
+        first_week: int,
+        count: int,
+        phase: str,
+        race_distance: str
+    ) -> list[Dict[str, Any]]:
+        """Generate several consecutive weeks of one phase in a single model call."""
+        cache_key = make_cache_key(
+            "weeks",
+            request.model_dump(mode="json"),
+            model=self.deployment_name,
+            first_week=first_week,
+            count=count,
+            phase=phase,
+        )
+        cached = await get_cached_response(cache_key)
+        if cached is not None:
+            return orjson.loads(cached)
         
-        response = self._create_chat_completion(
+        last_week = first_week + count - 1
+        prompt = build_week_prompt(request, first_week, last_week, phase, race_distance)
+        batch_data = await self._request_week_json(
+            prompt, max_output_tokens=min(MODEL_MAX_OUTPUT_TOKENS, WEEK_MAX_OUTPUT_TOKENS * count)
+        )
+        
+        weeks = batch_data.get("weeks")
+        if not isinstance(weeks, list) or len(weeks) != count:
+            raise ValueError(
+                f"Expected {count} weeks for weeks {first_week}-{last_week}, "
+                f"got {len(weeks) if isinstance(weeks, list) else 'none'}"
+            )
+        for offset, week_data in enumerate(weeks):
+            week_data["week_number"] = first_week + offset
+        
+        # Auto-assign weekdays if missing
+        weeks = assign_weekdays_to_workouts({"weeks": weeks})["weeks"]
+        
+        await store_response(cache_key, orjson.dumps(weeks).decode("utf-8"))
+        return weeks
+    
+    async def _request_week_json(self, prompt: str, max_output_tokens: int) -> Dict[str, Any]:
+        """Run a week-generation prompt and parse the returned JSON object."""
+        stream = await self._create_chat_completion(
             messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "system", "content": WEEK_SYSTEM_PROMPT},
                 {"role": "user", "content": prompt},
             ],
             temperature=None,
-            max_output_tokens=3000,
+            max_output_tokens=max_output_tokens,
             json_object=True,
         )
         
-        content = self._extract_json_object_text(response.choices[0].message.content)
+        raw_content, finish_reason = await self._collect_stream(stream)
+        content = self._extract_json_object_text(raw_content or "")
+        
+        # A response cut off at the token cap is truncated JSON; say so explicitly
+        if finish_reason == "length":
+            raise ValueError(
+                f"Model hit token limit (finish_reason='length'). "
+                f"Received {len(content)} chars but JSON may be incomplete. "
+                f"Try: 1) Increase WEEK_MAX_OUTPUT_TOKENS (output budget was "
+                f"{max_output_tokens} tokens, plus REASONING_TOKEN_ALLOWANCE for reasoning models), "
+                f"or 2) Use a model with larger output capacity."
+            )
 
         try:
-            week_data = json.loads(content)
-            # Auto-assign weekdays if missing
-            week_data = assign_weekdays_to_workouts({"weeks": [week_data]})["weeks"][0]
-            return week_data
-        except json.JSONDecodeError as exc:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError as exc:
             preview = content[:800].replace("\n", "\\n")
             raise ValueError(
                 "Model did not return valid JSON. "
@@ -1,22 +1,53 @@
 """Authentication module for Entra External ID (Azure AD B2C)."""
-import msal
 import logging
-from fastapi import Request, HTTPException, status
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from fastapi import BackgroundTasks, Request, HTTPException, status
 from fastapi.responses import RedirectResponse
-from typing import Optional, Dict, Any
+from typing import TYPE_CHECKING, Optional, Dict, Any
 from datetime import datetime, timedelta
 from itsdangerous import URLSafeTimedSerializer, BadSignature
 from app.config import settings
 from app.database import SessionLocal, User
 
+if TYPE_CHECKING:
+    # msal (and its cryptography dependency) is imported on first login, not at startup
+    import msal
+
 logger = logging.getLogger(__name__)
 
+# Minimum interval between last_login updates for an active session
+LAST_LOGIN_UPDATE_INTERVAL_SECONDS = 300
+# Maximum number of verified session tokens remembered per process
+SESSION_TOKEN_CACHE_SIZE = 4096
+
+
+@dataclass(frozen=True)
+class SessionUser:
+    """Authenticated user reconstructed from the signed session cookie (no DB lookup)."""
+    id: int
+    oid: str
+    email: str
+    name: Optional[str] = None
+    
+    @classmethod
+    def from_user(cls, user: User) -> "SessionUser":
+        return cls(id=user.id, oid=user.oid, email=user.email, name=user.name)
+
 
 class AuthManager:
     """Manages authentication with Entra External ID."""
     
     def __init__(self):
         self.enabled = settings.enable_auth
+        # Per-process bookkeeping for throttled last_login updates (user id -> timestamp)
+        self._last_login_updates: Dict[int, float] = {}
+        self._default_user: Optional[SessionUser] = None
+        # Recently verified session tokens -> (payload, signing time), least recently used first
+        self._verified_tokens: "OrderedDict[str, tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._verified_tokens_lock = threading.Lock()
         if not self.enabled:
             return
             
@@ -47,14 +78,25 @@ class AuthManager:
         
         # Session serializer for secure cookies
         self.serializer = URLSafeTimedSerializer(settings.session_secret_key)
+        
+        # MSAL app is created lazily (construction fetches the OIDC discovery document)
+        # and then reused for every login/callback in this process.
+        self._msal_app: Optional["msal.ConfidentialClientApplication"] = None
+        self._msal_lock = threading.Lock()
     
-    def get_msal_app(self) -> msal.ConfidentialClientApplication:
-        """Create MSAL application instance."""
-        return msal.ConfidentialClientApplication(
-            self.client_id,
-            authority=self.authority,
-            client_credential=self.client_secret,
-        )
+    def get_msal_app(self) -> "msal.ConfidentialClientApplication":
+        """Get the shared MSAL application instance, creating it on first use."""
+        if self._msal_app is None:
+            with self._msal_lock:
+                if self._msal_app is None:
+                    import msal
+                    self._msal_app = msal.ConfidentialClientApplication(
+                        self.client_id,
+                        authority=self.authority,
+                        client_credential=self.client_secret,
+                        token_cache=msal.SerializableTokenCache(),
+                    )
+        return self._msal_app
     
     def get_auth_url(self, state: str = None) -> str:
         """Get authorization URL for login."""
@@ -89,11 +131,37 @@ class AuthManager:
         return self.serializer.dumps(user_data)
     
     def verify_session_token(self, token: str, max_age: int = 86400 * 7) -> Optional[Dict[str, Any]]:
-        """Verify and decode session token. Default max age is 7 days."""
+        """Verify and decode session token. Default max age is 7 days.
+        
+        The signature is only checked the first time a token is seen; later
+        requests reuse the cached payload until the token is older than max_age.
+        """
+        with self._verified_tokens_lock:
+            cached = self._verified_tokens.get(token)
+            if cached is not None:
+                self._verified_tokens.move_to_end(token)
+        if cached is not None:
+            user_data, signed_at = cached
+            if time.time() - signed_at <= max_age:
+                return user_data
+            self.forget_session_token(token)
+            return None
+        
         try:
-            return self.serializer.loads(token, max_age=max_age)
+            user_data, signed_at = self.serializer.loads(token, max_age=max_age, return_timestamp=True)
         except BadSignature:
             return None
+        
+        with self._verified_tokens_lock:
+            self._verified_tokens[token] = (user_data, signed_at.timestamp())
+            if len(self._verified_tokens) > SESSION_TOKEN_CACHE_SIZE:
+                self._verified_tokens.popitem(last=False)
+        return user_data
+    
+    def forget_session_token(self, token: str) -> None:
+        """Drop a token from the verification cache (e.g. on logout)."""
+        with self._verified_tokens_lock:
+            self._verified_tokens.pop(token, None)
     
     async def get_or_create_user(self, token_data: Dict[str, Any]) -> User:
         """Get existing user or create new one from token data."""
@@ -147,8 +215,14 @@ class AuthManager:
         finally:
             db.close()
     
-    async def get_current_user(self, request: Request) -> Optional[User]:
-        """Get current authenticated user from request."""
+    async def get_current_user(
+        self, request: Request, background_tasks: Optional[BackgroundTasks] = None
+    ) -> Optional[SessionUser]:
+        """Get current authenticated user from request.
+
+        The user is rebuilt from the signed session cookie; the database is only
+        read for cookies issued before the user id was stored in the session.
+        """
         if not self.enabled:
             # If auth is disabled, return a default user for development
             return self._get_default_user()
@@ -163,16 +237,56 @@ class AuthManager:
         if not user_data:
             return None
         
-        # Get user from database
+        if "id" in user_data:
+            user = SessionUser(
+                id=user_data["id"],
+                oid=user_data["oid"],
+                email=user_data["email"],
+                name=user_data.get("name"),
+            )
+        else:
+            # Legacy session cookie without the user id
+            db = SessionLocal()
+            try:
+                db_user = db.query(User).filter(User.oid == user_data["oid"]).first()
+            finally:
+                db.close()
+            if not db_user:
+                return None
+            user = SessionUser.from_user(db_user)
+        
+        if background_tasks is not None:
+            self._schedule_last_login_update(user.id, background_tasks)
+        return user
+    
+    def _schedule_last_login_update(self, user_id: int, background_tasks: BackgroundTasks) -> None:
+        """Record activity in the database at most once per interval per user."""
+        now = time.monotonic()
+        last_update = self._last_login_updates.get(user_id)
+        if last_update is not None and now - last_update < LAST_LOGIN_UPDATE_INTERVAL_SECONDS:
+            return
+        self._last_login_updates[user_id] = now
+        background_tasks.add_task(self._update_last_login, user_id)
+    
+    @staticmethod
+    def _update_last_login(user_id: int) -> None:
+        """Set last_login for a user (runs after the response is sent)."""
         db = SessionLocal()
         try:
-            user = db.query(User).filter(User.oid == user_data["oid"]).first()
-            return user
+            db.query(User).filter(User.id == user_id).update(
+                {User.last_login: datetime.utcnow()}, synchronize_session=False
+            )
+            db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to update last_login for user {user_id}: {e}")
         finally:
             db.close()
     
-    def _get_default_user(self) -> User:
+    def _get_default_user(self) -> SessionUser:
         """Get or create default user for development (when auth is disabled)."""
+        if self._default_user is not None:
+            return self._default_user
+        
         db = SessionLocal()
         try:
             user = db.query(User).filter(User.email == "dev@example.com").first()
@@ -188,13 +302,14 @@ class AuthManager:
                 db.add(user)
                 db.commit()
                 db.refresh(user)
-            return user
+            self._default_user = SessionUser.from_user(user)
+            return self._default_user
         finally:
             db.close()
     
-    async def require_auth(self, request: Request) -> User:
+    async def require_auth(self, request: Request, background_tasks: BackgroundTasks) -> SessionUser:
         """Require authentication. Raises HTTPException if not authenticated."""
-        user = await self.get_current_user(request)
+        user = await self.get_current_user(request, background_tasks)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -203,8 +318,12 @@ class AuthManager:
             )
         return user
     
-    def logout(self) -> RedirectResponse:
+    def logout(self, request: Optional[Request] = None) -> RedirectResponse:
         """Logout user by clearing session."""
+        if request is not None:
+            token = request.cookies.get("session_token")
+            if token:
+                self.forget_session_token(token)
         response = RedirectResponse(url="/", status_code=status.HTTP_302_FOUND)
         response.delete_cookie("session_token")
         return response
@@ -1,9 +1,18 @@
-from pydantic_settings import BaseSettings
+from functools import lru_cache
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field, AliasChoices
 from typing import Optional
 
 
 class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+    
+    # Deployment environment: "production" on App Service, anything else locally
+    environment: str = Field(
+        default="development",
+        validation_alias=AliasChoices("ENVIRONMENT", "environment"),
+    )
+    
     # Azure AI / OpenAI settings
     azure_ai_endpoint: Optional[str] = Field(
         default=None,
@@ -50,12 +59,38 @@ class Settings(BaseSettings):
             "azure_ai_managed_identity_client_id",
         ),
     )
+    # Maximum number of concurrent chat-completion calls per process (respects TPM quota)
+    azure_ai_max_concurrent_requests: int = Field(
+        default=4,
+        validation_alias=AliasChoices(
+            "AZURE_AI_MAX_CONCURRENT_REQUESTS",
+            "azure_ai_max_concurrent_requests",
+        ),
+    )
+    # Exact-match cache of generated programs/weeks (identical requests skip the model call)
+    llm_cache_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("LLM_CACHE_ENABLED", "llm_cache_enabled"),
+    )
+    llm_cache_ttl_seconds: int = Field(
+        default=86400 * 7,
+        validation_alias=AliasChoices("LLM_CACHE_TTL_SECONDS", "llm_cache_ttl_seconds"),
+    )
     
     # Database - Azure SQL Database
     database_url: str = Field(
         default="",
         validation_alias=AliasChoices("DATABASE_URL", "database_url"),
     )
+    # Async (API request) connection pool sizing, per worker (ignored for SQLite)
+    database_pool_size: int = Field(
+        default=20,
+        validation_alias=AliasChoices("DATABASE_POOL_SIZE", "database_pool_size"),
+    )
+    database_max_overflow: int = Field(
+        default=40,
+        validation_alias=AliasChoices("DATABASE_MAX_OVERFLOW", "database_max_overflow"),
+    )
     
     # Authentication (Entra External ID)
     enable_auth: bool = Field(
@@ -87,9 +122,12 @@ class Settings(BaseSettings):
         default="change-me-in-production-use-openssl-rand-hex-32",
         validation_alias=AliasChoices("SESSION_SECRET_KEY", "session_secret_key"),
     )
-    
-    class Config:
-        env_file = ".env"
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings, parsing the environment only once."""
+    return Settings()
+
+
+settings = get_settings()
@@ -1,21 +1,103 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy import create_engine, event, make_url, Column, Integer, String, Float, DateTime, Text, ForeignKey, Boolean, Index
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, relationship, deferred
 from datetime import datetime
+import threading
+import orjson
 from app.config import settings
 
 Base = declarative_base()
 
 # Configure engine for Azure SQL Database
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-    echo=False
-)
+engine_options = {
+    "pool_pre_ping": True,
+    "echo": False,
+    # Room for every repository query shape (filter combinations x dialect)
+    # so compiled SQL is reused instead of recompiled per request.
+    "query_cache_size": 1200,
+}
+# The sync engine only serves auth lookups and migrations, so it gets a small pool
+SYNC_POOL_SIZE = 2
+SYNC_MAX_OVERFLOW = 3
+
+sync_engine_options = dict(engine_options)
+async_engine_options = dict(engine_options)
+if not settings.database_url.startswith("sqlite"):
+    # Size the async pool for concurrent requests and recycle connections
+    # before Azure SQL's idle timeout drops them.
+    async_engine_options.update(
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_recycle=1800,
+    )
+    sync_engine_options.update(
+        pool_size=SYNC_POOL_SIZE,
+        max_overflow=SYNC_MAX_OVERFLOW,
+        pool_recycle=1800,
+    )
+if settings.database_url.startswith("mssql+pyodbc"):
+    # Send executemany() batches in one round trip instead of one per row.
+    # pyodbc only: the aioodbc cursor can't take the attribute.
+    sync_engine_options["fast_executemany"] = True
+
+# asyncio drivers for the configured (sync) database drivers
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "mssql": "mssql+aioodbc",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def _async_database_url(url: str):
+    """Map the configured database URL onto the matching asyncio driver."""
+    sa_url = make_url(url)
+    return sa_url.set(drivername=ASYNC_DRIVERS.get(sa_url.get_backend_name(), sa_url.drivername))
+
+
+# The sync engine serves auth and migrations; API endpoints and the LLM cache
+# use the async engine so database round trips don't block the event loop.
+engine = create_engine(settings.database_url, **sync_engine_options)
+async_engine = create_async_engine(_async_database_url(settings.database_url), **async_engine_options)
+
+if settings.database_url.startswith("sqlite"):
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Use WAL so local dev readers don't block on the writer."""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+    
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+class OrjsonText(TypeDecorator):
+    """JSON document stored as text (NVARCHAR(MAX) on Azure SQL), (de)serialized with orjson.
+
+    Already-serialized JSON (str, or UTF-8 bytes from pydantic's serializer) is
+    written as-is, so callers holding it don't pay for a second serialization pass.
+    """
+    impl = Text
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, str):
+            return value
+        if isinstance(value, bytes):
+            return value.decode("utf-8")
+        return orjson.dumps(value).decode("utf-8")
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return orjson.loads(value)
 
 
 class User(Base):
@@ -31,8 +113,18 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     
     # Relationships
-    programs = relationship("SavedProgram", back_populates="user", cascade="all, delete-orphan")
-    workout_history = relationship("WorkoutHistory", back_populates="user", cascade="all, delete-orphan")
+    programs = relationship(
+        "SavedProgram",
+        back_populates="user",
+        cascade="all, delete-orphan",
+        order_by="SavedProgram.created_at.desc()",
+    )
+    workout_history = relationship(
+        "WorkoutHistory",
+        back_populates="user",
+        cascade="all, delete-orphan",
+        order_by="WorkoutHistory.completed_at.desc()",
+    )
 
 
 class SavedProgram(Base):
@@ -47,13 +139,18 @@ class SavedProgram(Base):
     fitness_level = Column(String(50), nullable=False)
     duration_weeks = Column(Integer, nullable=False)
     available_hours_per_week = Column(Integer, nullable=False)
-    program_json = Column(Text, nullable=False)  # Store full program as JSON
+    # Store full program as JSON; deferred so listings don't load the large blob
+    program_json = deferred(Column(OrjsonText, nullable=False))
     notes = Column(Text)
     
     # Relationship
     user = relationship("User", back_populates="programs")
 
 
+# Backs the per-user "newest first" program listing
+Index("ix_programs_user_created", SavedProgram.user_id, SavedProgram.created_at.desc())
+
+
 class WorkoutHistory(Base):
     """Database model for tracking completed workouts."""
     __tablename__ = "workout_history"
@@ -73,11 +170,58 @@ class WorkoutHistory(Base):
     user = relationship("User", back_populates="workout_history")
 
 
+# Back the per-user "most recent first" history listing, unfiltered and by sport
+# (the latter also serves per-sport stats)
+Index("ix_history_user_completed", WorkoutHistory.user_id, WorkoutHistory.completed_at.desc())
+Index(
+    "ix_history_user_sport_completed",
+    WorkoutHistory.user_id,
+    WorkoutHistory.sport,
+    WorkoutHistory.completed_at.desc(),
+)
+
+
+class LLMCache(Base):
+    """Database model for cached LLM responses, keyed on a hash of the request parameters."""
+    __tablename__ = "llm_cache"
+    
+    key = Column(String(64), primary_key=True)  # SHA-256 hex digest
+    response_json = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+# Lets expired-entry pruning find old rows without scanning the table
+Index("ix_llm_cache_created", LLMCache.created_at)
+
+
 def init_db():
-    """Initialize the database tables."""
+    """Create the tables for local SQLite development.
+    
+    Other databases are managed by Alembic migrations (`alembic upgrade head`,
+    run from startup.sh before the app starts), so this is a no-op there.
+    """
+    if not settings.database_url.startswith("sqlite"):
+        return
     Base.metadata.create_all(bind=engine)
 
 
+if settings.database_url.startswith("sqlite"):
+    _tables_ready = False
+    _tables_ready_lock = threading.Lock()
+    
+    # Registered on Session itself so async sessions trigger it too
+    @event.listens_for(Session, "after_begin")
+    def _create_tables_on_first_use(session, transaction, connection):
+        """Create the SQLite dev schema when the first session starts, not at import."""
+        global _tables_ready
+        if _tables_ready:
+            return
+        with _tables_ready_lock:
+            if not _tables_ready:
+                init_db()
+                _tables_ready = True
+
+
 def get_db():
     """Dependency for getting database sessions."""
     db = SessionLocal()
@@ -85,3 +229,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency for getting async database sessions."""
+    async with AsyncSessionLocal() as db:
+        yield db
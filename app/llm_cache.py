@@ -0,0 +1,71 @@
+"""Exact-match response cache for LLM generations.
+
+Program and week generation is a pure function of the request parameters, so
+identical requests can be answered from the database instead of the model.
+"""
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete
+
+from app.config import settings
+from app.database import AsyncSessionLocal, LLMCache
+
+logger = logging.getLogger(__name__)
+
+# Expired entries are pruned on a store at most this often per process
+PRUNE_INTERVAL_SECONDS = 3600
+_next_prune_at = 0.0
+
+
+def make_cache_key(kind: str, request_data: Dict[str, Any], **extra: Any) -> str:
+    """Build a canonical SHA-256 key from the request fields plus any extra parameters."""
+    payload = {"kind": kind, "request": request_data, **extra}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+async def get_cached_response(key: str) -> Optional[str]:
+    """Return the cached JSON for a key, or None on a miss or expired entry."""
+    if not settings.llm_cache_enabled:
+        return None
+    
+    try:
+        async with AsyncSessionLocal() as db:
+            entry = await db.get(LLMCache, key)
+            if entry is None:
+                return None
+            if datetime.utcnow() - entry.created_at > timedelta(seconds=settings.llm_cache_ttl_seconds):
+                return None
+            return entry.response_json
+    except Exception as e:
+        # The cache is an optimization; never fail a generation because of it.
+        logger.warning(f"LLM cache lookup failed: {e}")
+        return None
+
+
+async def store_response(key: str, response_json: str) -> None:
+    """Insert or replace the cached JSON for a key, periodically pruning expired entries."""
+    global _next_prune_at
+    if not settings.llm_cache_enabled:
+        return
+    
+    now = datetime.utcnow()
+    prune = time.monotonic() >= _next_prune_at
+    if prune:
+        _next_prune_at = time.monotonic() + PRUNE_INTERVAL_SECONDS
+    try:
+        async with AsyncSessionLocal() as db:
+            if prune:
+                await db.execute(
+                    delete(LLMCache).where(
+                        LLMCache.created_at < now - timedelta(seconds=settings.llm_cache_ttl_seconds)
+                    )
+                )
+            await db.merge(LLMCache(key=key, response_json=response_json, created_at=now))
+            await db.commit()
+    except Exception as e:
+        logger.warning(f"LLM cache store failed: {e}")
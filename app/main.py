@@ -11,22 +11,20 @@ Features:
 """
 from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, RedirectResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from typing import List, Optional
-import json
-import uvicorn
+import orjson
 import sys
 import logging
 
-from app.database import init_db, get_db, User
-from app.models import WorkoutRequest, TrainingProgram, RaceDistance, Sport
+from app.database import get_async_db, AsyncSessionLocal
+from app.models import WorkoutRequest, WeekPlan, RaceDistance, Sport
 from app.config import settings
 from app.repository import ProgramRepository, WorkoutHistoryRepository
-from app.auth import auth_manager
+from app.auth import auth_manager, SessionUser
 
 logger = logging.getLogger(__name__)
 
@@ -41,23 +39,47 @@ def validate_configuration():
 app = FastAPI(
     title="Triathlon Program Generator",
     description="AI-powered triathlon training program generator",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
-# Add CORS middleware to allow credentials
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["https://endurely-app.azurewebsites.net", "http://localhost:8000"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# In production the UI and API share one origin, so CORS is only needed (and the
+# middleware only added) for local development.
+if settings.environment.lower() != "production":
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["https://endurely-app.azurewebsites.net", "http://localhost:8000"],
+        allow_credentials=True,
+        allow_methods=["GET", "POST", "DELETE"],
+        allow_headers=["Content-Type", "Authorization"],
+    )
+
+# Database connectivity probe, built once and reused by the readiness check
+_PING = text("SELECT 1")
+
+# Lazy-load templates (Jinja2) on the first HTML request
+_templates = None
+
+def get_templates():
+    """Get or create the Jinja2 templates instance (lazy initialization)."""
+    global _templates
+    if _templates is None:
+        from fastapi.templating import Jinja2Templates
+        _templates = Jinja2Templates(directory="app/templates")
+    return _templates
+
 
-# Initialize database
-init_db()
+# The HTML pages are static shells (program.html reads the program id from the
+# URL), so each is rendered once and then served from memory.
+_rendered_pages: dict[str, bytes] = {}
 
-# Setup templates
-templates = Jinja2Templates(directory="app/templates")
+def render_page(name: str) -> bytes:
+    """Get a rendered template, rendering it on first use."""
+    page = _rendered_pages.get(name)
+    if page is None:
+        page = get_templates().get_template(name).render().encode("utf-8")
+        _rendered_pages[name] = page
+    return page
 
 # Lazy-load agent for faster startup
 _agent = None
@@ -98,6 +120,7 @@ async def auth_callback(code: str, state: str = None):
         
         # Create session token
         session_token = auth_manager.create_session_token({
+            "id": user.id,
             "oid": user.oid,
             "email": user.email,
             "name": user.name,
@@ -120,9 +143,9 @@ async def auth_callback(code: str, state: str = None):
 
 
 @app.get("/auth/logout")
-async def logout():
+async def logout(request: Request):
     """Logout current user."""
-    return auth_manager.logout()
+    return auth_manager.logout(request)
 
 
 @app.get("/api/auth/user")
@@ -158,11 +181,11 @@ async def health_check():
 
 
 @app.get("/health/ready")
-async def readiness_check(db: Session = Depends(get_db)):
+async def readiness_check(db: AsyncSession = Depends(get_async_db)):
     """Readiness check - verifies database connectivity and LLM configuration."""
     try:
         # Check database
-        db.execute(text("SELECT 1"))
+        await db.execute(_PING)
         
         # Check Azure AI configuration
         if not settings.azure_ai_endpoint:
@@ -190,42 +213,85 @@ async def liveness_check():
 @app.post("/api/workouts/generate", response_model=dict)
 async def generate_workout(
     request: WorkoutRequest,
-    db: Session = Depends(get_db),
-    user: User = Depends(auth_manager.require_auth)
+    db: AsyncSession = Depends(get_async_db),
+    user: SessionUser = Depends(auth_manager.require_auth)
 ):
     """Generate a new training program using the AI agent."""
     try:
         # Generate program using AI (lazy-loaded agent)
         agent = get_agent()
-        program = agent.generate_program(request)
+        generated = await agent.generate_program(request)
         
         # Save to database with user association
-        saved_program = ProgramRepository.save_program(
+        saved_program, program_json = await ProgramRepository.save_program(
             db=db,
-            program=program,
+            program=generated.program,
             request_data=request.model_dump(),
-            user_id=user.id
+            user_id=user.id,
+            program_json=generated.program_json
         )
         
-        return {
+        # Reuse the JSON produced for the database instead of dumping the program again
+        return ORJSONResponse({
             "id": saved_program.id,
-            "program": program.model_dump(),
+            "program": orjson.Fragment(program_json),
             "message": "Training program generated successfully"
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating program: {str(e)}")
 
 
+@app.post("/api/workouts/generate/stream")
+async def generate_workout_stream(
+    request: WorkoutRequest,
+    user: SessionUser = Depends(auth_manager.require_auth)
+):
+    """Generate a training program, streaming weeks as newline-delimited JSON.
+
+    Emits one `{"week": {...}}` line per completed week (possibly out of order),
+    then a final `{"id": ..., "program": {...}, "message": ...}` line once the
+    program is validated and saved. Failures are reported as `{"error": "..."}`.
+    """
+    agent = get_agent()
+    user_id = user.id
+    
+    async def _events():
+        try:
+            async for item in agent.stream_program(request):
+                if isinstance(item, WeekPlan):
+                    yield orjson.dumps({"week": item.model_dump()}) + b"\n"
+                    continue
+                # Final item: the complete program with its serialized JSON.
+                # The request-scoped session may already be closed while streaming.
+                async with AsyncSessionLocal() as db:
+                    saved_program, program_json = await ProgramRepository.save_program(
+                        db=db,
+                        program=item.program,
+                        request_data=request.model_dump(),
+                        user_id=user_id,
+                        program_json=item.program_json
+                    )
+                yield orjson.dumps({
+                    "id": saved_program.id,
+                    "program": orjson.Fragment(program_json),
+                    "message": "Training program generated successfully"
+                }) + b"\n"
+        except Exception as e:
+            yield orjson.dumps({"error": f"Error generating program: {str(e)}"}) + b"\n"
+    
+    return StreamingResponse(_events(), media_type="application/x-ndjson")
+
+
 @app.get("/api/workouts", response_model=List[dict])
 async def list_workouts(
     skip: int = 0,
     limit: int = 100,
     goal: Optional[RaceDistance] = None,
-    db: Session = Depends(get_db),
-    user: User = Depends(auth_manager.require_auth)
+    db: AsyncSession = Depends(get_async_db),
+    user: SessionUser = Depends(auth_manager.require_auth)
 ):
     """List all saved workout programs for the current user."""
-    programs = ProgramRepository.list_programs(
+    programs = await ProgramRepository.list_programs(
         db=db,
         skip=skip,
         limit=limit,
@@ -233,28 +299,17 @@ async def list_workouts(
         user_id=user.id
     )
     
-    return [
-        {
-            "id": p.id,
-            "created_at": p.created_at.isoformat(),
-            "goal": p.goal,
-            "fitness_level": p.fitness_level,
-            "duration_weeks": p.duration_weeks,
-            "available_hours_per_week": p.available_hours_per_week,
-            "notes": p.notes
-        }
-        for p in programs
-    ]
+    return [dict(p._mapping) for p in programs]
 
 
 @app.get("/api/workouts/{program_id}", response_model=dict)
 async def get_workout(
     program_id: int,
-    db: Session = Depends(get_db),
-    user: User = Depends(auth_manager.require_auth)
+    db: AsyncSession = Depends(get_async_db),
+    user: SessionUser = Depends(auth_manager.require_auth)
 ):
     """Get a specific workout program by ID."""
-    program = ProgramRepository.get_program(
+    program = await ProgramRepository.get_program(
         db=db,
         program_id=program_id,
         user_id=user.id
@@ -263,24 +318,25 @@ async def get_workout(
     if not program:
         raise HTTPException(status_code=404, detail="Program not found")
     
-    return {
+    # The stored program JSON is embedded as-is rather than parsed and re-serialized
+    return ORJSONResponse({
         "id": program.id,
-        "created_at": program.created_at.isoformat(),
+        "created_at": program.created_at,
         "goal": program.goal,
         "fitness_level": program.fitness_level,
         "duration_weeks": program.duration_weeks,
-        "program": json.loads(program.program_json)
-    }
+        "program": orjson.Fragment(program.program_json)
+    })
 
 
 @app.delete("/api/workouts/{program_id}")
 async def delete_workout(
     program_id: int,
-    db: Session = Depends(get_db),
-    user: User = Depends(auth_manager.require_auth)
+    db: AsyncSession = Depends(get_async_db),
+    user: SessionUser = Depends(auth_manager.require_auth)
 ):
     """Delete a workout program."""
-    success = ProgramRepository.delete_program(
+    success = await ProgramRepository.delete_program(
         db=db,
         program_id=program_id,
         user_id=user.id
@@ -301,11 +357,11 @@ async def log_workout(
     distance_km: Optional[float] = None,
     notes: Optional[str] = None,
     rating: Optional[int] = None,
-    db: Session = Depends(get_db),
-    user: User = Depends(auth_manager.require_auth)
+    db: AsyncSession = Depends(get_async_db),
+    user: SessionUser = Depends(auth_manager.require_auth)
 ):
     """Log a completed workout."""
-    workout = WorkoutHistoryRepository.log_workout(
+    workout = await WorkoutHistoryRepository.log_workout(
         db=db,
         program_id=program_id,
         sport=sport.value,
@@ -329,11 +385,11 @@ async def get_workout_history(
     sport: Optional[Sport] = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    user: User = Depends(auth_manager.require_auth)
+    db: AsyncSession = Depends(get_async_db),
+    user: SessionUser = Depends(auth_manager.require_auth)
 ):
     """Get workout history for the current user."""
-    workouts = WorkoutHistoryRepository.get_workout_history(
+    workouts = await WorkoutHistoryRepository.get_workout_history(
         db=db,
         program_id=program_id,
         sport=sport.value if sport else None,
@@ -342,25 +398,13 @@ async def get_workout_history(
         user_id=user.id
     )
     
-    return [
-        {
-            "id": w.id,
-            "completed_at": w.completed_at.isoformat(),
-            "sport": w.sport,
-            "title": w.title,
-            "duration_minutes": w.duration_minutes,
-            "distance_km": w.distance_km,
-            "notes": w.notes,
-            "rating": w.rating
-        }
-        for w in workouts
-    ]
+    return [dict(w._mapping) for w in workouts]
 
 
 @app.get("/api/stats")
-async def get_stats(sport: Optional[Sport] = None, db: Session = Depends(get_db)):
+async def get_stats(sport: Optional[Sport] = None, db: AsyncSession = Depends(get_async_db)):
     """Get workout statistics."""
-    stats = WorkoutHistoryRepository.get_workout_stats(
+    stats = await WorkoutHistoryRepository.get_workout_stats(
         db=db,
         sport=sport.value if sport else None
     )
@@ -370,18 +414,15 @@ async def get_stats(sport: Optional[Sport] = None, db: Session = Depends(get_db)
 # Web Interface
 
 @app.get("/", response_class=HTMLResponse)
-async def home(request: Request):
+async def home():
     """Serve the main web interface."""
-    return templates.TemplateResponse("index.html", {"request": request})
+    return HTMLResponse(render_page("index.html"))
 
 
 @app.get("/programs/{program_id}", response_class=HTMLResponse)
-async def view_program(request: Request, program_id: int):
+async def view_program(program_id: int):
     """View a specific training program."""
-    return templates.TemplateResponse(
-        "program.html",
-        {"request": request, "program_id": program_id}
-    )
+    return HTMLResponse(render_page("program.html"))
 
 
 if __name__ == "__main__":
@@ -389,4 +430,16 @@ if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
     print(f"Starting Triathlon Program Generator on port {port}...")
     print(f"Navigate to http://localhost:{port} to access the web interface")
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    import uvicorn
+    # Import string (not the app object) so multiple workers can be started
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=port,
+        workers=int(os.getenv("WEB_CONCURRENCY", 1)),
+        loop="uvloop" if sys.platform != "win32" else "auto",
+        http="httptools",
+        proxy_headers=True,
+        server_header=False,
+        date_header=False,
+    )
@@ -0,0 +1,97 @@
+"""Initial schema
+
+Databases created before migrations were introduced already have some or all
+of these tables (from `Base.metadata.create_all`), so every table and index is
+only created when missing.
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-02-01
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _create_table(inspector, name, *columns):
+    if not inspector.has_table(name):
+        op.create_table(name, *columns)
+
+
+def _create_index(inspector, name, table, columns, unique=False):
+    if name not in {index["name"] for index in inspector.get_indexes(table)}:
+        op.create_index(name, table, columns, unique=unique)
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    _create_table(
+        inspector,
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("oid", sa.String(256), nullable=False),
+        sa.Column("email", sa.String(256), nullable=False),
+        sa.Column("name", sa.String(256), nullable=True),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("last_login", sa.DateTime()),
+        sa.Column("is_active", sa.Boolean()),
+    )
+    _create_table(
+        inspector,
+        "training_programs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("sport_type", sa.String(50), nullable=False),
+        sa.Column("goal", sa.String(256), nullable=False),
+        sa.Column("fitness_level", sa.String(50), nullable=False),
+        sa.Column("duration_weeks", sa.Integer(), nullable=False),
+        sa.Column("available_hours_per_week", sa.Integer(), nullable=False),
+        sa.Column("program_json", sa.Text(), nullable=False),
+        sa.Column("notes", sa.Text()),
+    )
+    _create_table(
+        inspector,
+        "workout_history",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("program_id", sa.Integer(), nullable=True),
+        sa.Column("completed_at", sa.DateTime()),
+        sa.Column("sport", sa.String(50), nullable=False),
+        sa.Column("title", sa.String(256), nullable=False),
+        sa.Column("duration_minutes", sa.Integer(), nullable=False),
+        sa.Column("distance_km", sa.Float(), nullable=True),
+        sa.Column("notes", sa.Text()),
+        sa.Column("rating", sa.Integer()),
+    )
+    _create_table(
+        inspector,
+        "llm_cache",
+        sa.Column("key", sa.String(64), primary_key=True),
+        sa.Column("response_json", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+    )
+
+    # Re-inspect so indexes created alongside new tables are seen
+    inspector = sa.inspect(op.get_bind())
+    _create_index(inspector, "ix_users_id", "users", ["id"])
+    _create_index(inspector, "ix_users_oid", "users", ["oid"], unique=True)
+    _create_index(inspector, "ix_users_email", "users", ["email"], unique=True)
+    _create_index(inspector, "ix_training_programs_id", "training_programs", ["id"])
+    _create_index(inspector, "ix_training_programs_user_id", "training_programs", ["user_id"])
+    _create_index(inspector, "ix_programs_user_created", "training_programs", ["user_id", "created_at"])
+    _create_index(inspector, "ix_workout_history_id", "workout_history", ["id"])
+    _create_index(inspector, "ix_workout_history_user_id", "workout_history", ["user_id"])
+    _create_index(inspector, "ix_history_user_completed", "workout_history", ["user_id", "completed_at"])
+
+
+def downgrade():
+    op.drop_table("llm_cache")
+    op.drop_table("workout_history")
+    op.drop_table("training_programs")
+    op.drop_table("users")
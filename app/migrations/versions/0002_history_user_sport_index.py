@@ -0,0 +1,24 @@
+"""Index workout history by user and sport
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-02-08
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite dev databases get this index from init_db's create_all
+    existing = {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("workout_history")}
+    if "ix_history_user_sport" not in existing:
+        op.create_index("ix_history_user_sport", "workout_history", ["user_id", "sport"])
+
+
+def downgrade():
+    op.drop_index("ix_history_user_sport", table_name="workout_history")
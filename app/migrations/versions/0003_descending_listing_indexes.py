@@ -0,0 +1,56 @@
+"""Descending listing indexes
+
+Recreate the listing indexes with the newest-first sort order the queries use,
+and replace the (user_id, sport) index with one that also covers the sort.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-02-15
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def _index_names(table):
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    # SQLite dev databases may already have the new indexes from init_db's create_all,
+    # so indexes are dropped and recreated by name rather than assumed absent.
+    programs = _index_names("training_programs")
+    if "ix_programs_user_created" in programs:
+        op.drop_index("ix_programs_user_created", table_name="training_programs")
+    op.create_index(
+        "ix_programs_user_created", "training_programs", ["user_id", sa.text("created_at DESC")]
+    )
+
+    history = _index_names("workout_history")
+    if "ix_history_user_completed" in history:
+        op.drop_index("ix_history_user_completed", table_name="workout_history")
+    op.create_index(
+        "ix_history_user_completed", "workout_history", ["user_id", sa.text("completed_at DESC")]
+    )
+    if "ix_history_user_sport_completed" in history:
+        op.drop_index("ix_history_user_sport_completed", table_name="workout_history")
+    op.create_index(
+        "ix_history_user_sport_completed",
+        "workout_history",
+        ["user_id", "sport", sa.text("completed_at DESC")],
+    )
+    if "ix_history_user_sport" in history:
+        op.drop_index("ix_history_user_sport", table_name="workout_history")
+
+
+def downgrade():
+    op.create_index("ix_history_user_sport", "workout_history", ["user_id", "sport"])
+    op.drop_index("ix_history_user_sport_completed", table_name="workout_history")
+    op.drop_index("ix_history_user_completed", table_name="workout_history")
+    op.create_index("ix_history_user_completed", "workout_history", ["user_id", "completed_at"])
+    op.drop_index("ix_programs_user_created", table_name="training_programs")
+    op.create_index("ix_programs_user_created", "training_programs", ["user_id", "created_at"])
@@ -0,0 +1,24 @@
+"""Index the LLM cache by creation time
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-02-22
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite dev databases get this index from init_db's create_all
+    existing = {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("llm_cache")}
+    if "ix_llm_cache_created" not in existing:
+        op.create_index("ix_llm_cache_created", "llm_cache", ["created_at"])
+
+
+def downgrade():
+    op.drop_index("ix_llm_cache_created", table_name="llm_cache")
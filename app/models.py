@@ -64,6 +64,27 @@ class FitnessLevel(str, Enum):
     ADVANCED = "advanced"
 
 
+# Sport names the model returns, mapped to a valid Sport value. Rest days default
+# to swim (is_rest_day will be true).
+_SPORT_ALIASES = {"swim": "swim", "bike": "bike", "run": "run", "rest": "swim"}
+
+# Goal spellings the model returns, mapped to RaceDistance values
+_GOAL_ALIASES = {
+    "70.3": "half_ironman",
+    "half-ironman": "half_ironman",
+    "half ironman": "half_ironman",
+    "140.6": "full_ironman",
+    "full-ironman": "full_ironman",
+    "full ironman": "full_ironman",
+    "ironman": "full_ironman",
+}
+
+# Values that need no normalization (the common case)
+_CANONICAL_PROGRAM_ENUM_VALUES = frozenset(
+    [goal.value for goal in RaceDistance] + [level.value for level in FitnessLevel]
+)
+
+
 class WorkoutInterval(BaseModel):
     duration_minutes: Optional[int] = None
     distance_km: Optional[float] = None
@@ -87,14 +108,15 @@ class Workout(BaseModel):
     @classmethod
     def lowercase_sport(cls, v):
         if isinstance(v, str):
+            sport = _SPORT_ALIASES.get(v)
+            if sport is not None:
+                return sport
             v = v.lower().strip()
-            # Map rest days and brick workouts to valid sports
-            if v == 'rest':
-                return 'swim'  # Default to swim for rest days (is_rest_day will be true)
+            sport = _SPORT_ALIASES.get(v)
+            if sport is not None:
+                return sport
             if 'bike' in v and 'run' in v:  # brick, bike-run, bike/run, etc.
                 return 'bike'  # Brick workouts are bike-to-run transitions, use bike as primary
-            if v in ['swim', 'bike', 'run']:
-                return v
             # If none match, default to run
             return 'run'
         return v
@@ -119,14 +141,12 @@ class TrainingProgram(BaseModel):
     @classmethod
     def lowercase_enums(cls, v):
         if isinstance(v, str):
+            if v in _CANONICAL_PROGRAM_ENUM_VALUES:
+                return v
             # Handle variations like "sprint triathlon" -> "sprint"
             v = v.lower().replace(' triathlon', '').strip()
             # Map common variations
-            if v in ['70.3', 'half-ironman', 'half ironman']:
-                return 'half_ironman'
-            if v in ['140.6', 'full-ironman', 'full ironman', 'ironman']:
-                return 'full_ironman'
-            return v
+            return _GOAL_ALIASES.get(v, v)
         return v
 
 
@@ -34,6 +34,105 @@ Key principles:
 You must respond with valid JSON matching the TrainingProgram schema."""
 
 
+# Static instructions for single-week generation. Kept byte-identical across
+# calls and sent together with SYSTEM_PROMPT so the whole block forms a stable,
+# cacheable prompt prefix; only a short per-week request follows it.
+WEEK_SYSTEM_PROMPT = SYSTEM_PROMPT + """
+
+You will be asked to create ONE week, or a range of consecutive weeks, of a longer training program. The request gives the week number(s), total program length, race, periodization phase, sport type, fitness level and available hours.
+
+Return a JSON object with this structure for a single week (be CONCISE in descriptions). For a range of weeks, return {"weeks": [...]} with one such object per week, in order:
+```json
+{
+  "week_number": 1,
+  "focus": "Base Training",
+  "workouts": [
+    {
+      "sport": "swim|bike|run",
+      "title": "Brief title",
+      "total_duration_minutes": 60,
+      "total_distance_km": 5.0,
+      "warmup": "Brief description",
+      "main_set": [
+        {
+          "duration_minutes": 30,
+          "distance_km": 3.0,
+          "intensity": "Zone 2",
+          "description": "Brief description"
+        }
+      ],
+      "cooldown": "Brief description",
+      "notes": "Brief notes"
+    },
+    {
+      "sport": "run",
+      "title": "Rest Day",
+      "is_rest_day": true,
+      "total_duration_minutes": 0,
+      "warmup": "",
+      "main_set": [],
+      "cooldown": "",
+      "notes": "Complete rest"
+    }
+  ],
+  "weekly_volume_hours": 6.5,
+  "weekly_distance_km": 45.0
+}
+```
+
+**Field reference**:
+- "week_number" (integer): position of the week in the program, starting at 1
+- "focus" (string): training focus of the week
+- "workouts" (array): the week's workouts, in order
+  - "sport" (string): "swim", "bike" or "run"
+  - "title" (string): short workout name
+  - "is_rest_day" (boolean, optional, default false): true only for rest days
+  - "total_duration_minutes" (integer): total workout time; 0 for rest days
+  - "total_distance_km" (number, optional): total workout distance
+  - "warmup" (string): warmup description; empty for rest days
+  - "main_set" (array): the intervals; empty for rest days
+    - "duration_minutes" (integer, optional): interval duration
+    - "distance_km" (number, optional): interval distance
+    - "intensity" (string): intensity zone, e.g. "Zone 2"
+    - "description" (string): what to do in the interval
+  - "cooldown" (string): cooldown description; empty for rest days
+  - "notes" (string, optional): extra guidance for the athlete
+- "weekly_volume_hours" (number): total training hours for the week
+- "weekly_distance_km" (number): total training distance for the week
+
+For a range such as Weeks 5-6, the response looks like:
+```json
+{
+  "weeks": [
+    {"week_number": 5, "focus": "Build Training", "workouts": [...], "weekly_volume_hours": 7.0, "weekly_distance_km": 50.0},
+    {"week_number": 6, "focus": "Build Training", "workouts": [...], "weekly_volume_hours": 7.5, "weekly_distance_km": 52.0}
+  ]
+}
+```
+
+**Rules**:
+1. "week_number" must be the requested week number (consecutive numbers for a range)
+2. "focus" must be "<Phase> Training" for the requested phase (e.g., "Build Training")
+3. Create 5-6 workouts
+4. Use ONLY "swim", "bike", or "run" for the sport field, based on the sport type:
+   - Triathlon: swim, bike, and run, with a brick workout (bike-to-run)
+   - Running: ONLY run
+   - Cycling: ONLY bike
+   - Duathlon: bike and run only (NO swim), with a brick workout
+   - Aquathlon: swim and run only (NO bike), with a swim-to-run transition workout
+5. Each workout must have specific intervals with intensity zones
+6. Keep descriptions under 10 words
+7. Return ONLY valid JSON"""
+
+
+# The only per-call part of the week prompt. Kept tiny so that almost every
+# token of a week request comes from the static WEEK_SYSTEM_PROMPT.
+WEEK_PROMPT_HEADER = (
+    "{weeks} of {duration_weeks}-week {race_distance}, Phase={phase}, "
+    "Sport={sport_type}, Fitness={fitness_level}, Hours={hours}"
+)
+
+
 RACE_DISTANCES = {
     # Triathlon
     "sprint": "Sprint Triathlon (750m swim, 20km bike, 5km run)",
@@ -61,45 +160,10 @@ RACE_DISTANCES = {
 }
 
 
-def build_user_prompt(request, concise: bool = False) -> str:
-    """Build user prompt for workout generation.
-    
-    Args:
-        request: WorkoutRequest with training parameters
-        concise: If True, use shorter descriptions (for smaller models)
-    """
-    # Handle both enum and string values
-    goal_value = request.goal.value if hasattr(request.goal, 'value') else request.goal
-    sport_type_value = request.sport_type.value if hasattr(request.sport_type, 'value') else request.sport_type
-    race_distance = RACE_DISTANCES.get(goal_value, goal_value)
-    
-    # Determine which sports to include based on sport type
-    sport_guidance = {
-        "triathlon": "Include swim, bike, and run workouts. Add brick workouts (bike-to-run transitions).",
-        "running": "Include ONLY run workouts. Focus on varied paces, intervals, tempo runs, and long runs.",
-        "cycling": "Include ONLY bike workouts. Focus on endurance rides, intervals, hill work, and tempo efforts.",
-        "duathlon": "Include bike and run workouts. Add brick workouts (bike-to-run transitions). NO swimming.",
-        "aquathlon": "Include swim and run workouts. Add transition workouts (swim-to-run). NO cycling.",
-    }
-    
-    sports_to_include = sport_guidance.get(sport_type_value, sport_guidance["triathlon"])
-    
-    prompt = f"""Create a {request.duration_weeks}-week training program:
-
-**Sport Type**: {sport_type_value.title()}
-**Goal**: {race_distance}
-**Fitness Level**: {request.fitness_level.value}
-**Available Time**: {request.available_hours_per_week} hours/week
-**Current Week**: {request.current_week}
-**Sports**: {sports_to_include}
-"""
-    
-    if request.focus_areas:
-        prompt += f"**Focus Areas**: {', '.join(request.focus_areas)}\n"
-    
-    if concise:
-        prompt += """
-**JSON Format** (keep descriptions brief, 5-10 words):
+# Output format instructions for whole-program requests. They open the user
+# prompt so every request shares the same prefix (eligible for automatic prompt
+# caching); the request-specific details are appended at the very end.
+CONCISE_PROGRAM_FORMAT = """**JSON Format** (keep descriptions brief, 5-10 words):
 ```json
 {
   "goal": "sprint",
@@ -139,9 +203,8 @@ def build_user_prompt(request, concise: bool = False) -> str:
 5. Include 1 rest day per week (is_rest_day: true, total_duration_minutes: 0)
 6. Return ONLY valid JSON
 """
-    else:
-        prompt += """
-**JSON Format**:
+
+FULL_PROGRAM_FORMAT = """**JSON Format**:
 ```json
 {
   "goal": "sprint",
@@ -213,5 +276,99 @@ def build_user_prompt(request, concise: bool = False) -> str:
 9. Order workouts by day (Monday first, Sunday last)
 10. Return ONLY the JSON, no markdown or extra text
 """
+
+# Which sports to include, by sport type
+SPORT_GUIDANCE = {
+    "triathlon": "Include swim, bike, and run workouts. Add brick workouts (bike-to-run transitions).",
+    "running": "Include ONLY run workouts. Focus on varied paces, intervals, tempo runs, and long runs.",
+    "cycling": "Include ONLY bike workouts. Focus on endurance rides, intervals, hill work, and tempo efforts.",
+    "duathlon": "Include bike and run workouts. Add brick workouts (bike-to-run transitions). NO swimming.",
+    "aquathlon": "Include swim and run workouts. Add transition workouts (swim-to-run). NO cycling.",
+}
+
+SPORT_TITLES = {sport: sport.title() for sport in SPORT_GUIDANCE}
+
+PROGRAM_REQUEST_DETAILS = """
+Create a {duration_weeks}-week training program:
+
+**Sport Type**: {sport_title}
+**Goal**: {race_distance}
+**Fitness Level**: {fitness_level}
+**Available Time**: {hours} hours/week
+**Current Week**: {current_week}
+**Sports**: {sports}
+"""
+
+# Fully rendered prompts per (sport type, concise), leaving only the
+# per-request fields as %-placeholders
+_PROMPT_FIELDS = ("duration_weeks", "race_distance", "fitness_level", "hours", "current_week")
+
+
+def _build_prompt_template(sport_type: str, concise: bool) -> str:
+    program_format = CONCISE_PROGRAM_FORMAT if concise else FULL_PROGRAM_FORMAT
+    details = PROGRAM_REQUEST_DETAILS.format(
+        sport_title=SPORT_TITLES.get(sport_type) or sport_type.title(),
+        sports=SPORT_GUIDANCE.get(sport_type, SPORT_GUIDANCE["triathlon"]).replace("%", "%%"),
+        **{field: f"%({field})s" for field in _PROMPT_FIELDS},
+    )
+    return program_format.replace("%", "%%") + details
+
+
+_PROMPT_TEMPLATES = {
+    (sport_type, concise): _build_prompt_template(sport_type, concise)
+    for sport_type in SPORT_GUIDANCE
+    for concise in (False, True)
+}
+
+
+def build_user_prompt(request, concise: bool = False) -> str:
+    """Build user prompt for workout generation.
     
+    Args:
+        request: WorkoutRequest with training parameters
+        concise: If True, use shorter descriptions (for smaller models)
+    """
+    # Handle both enum and string values
+    goal_value = request.goal.value if hasattr(request.goal, 'value') else request.goal
+    sport_type_value = request.sport_type.value if hasattr(request.sport_type, 'value') else request.sport_type
+    
+    template = _PROMPT_TEMPLATES.get((sport_type_value, concise))
+    if template is None:
+        template = _build_prompt_template(sport_type_value, concise)
+    prompt = template % {
+        "duration_weeks": request.duration_weeks,
+        "race_distance": RACE_DISTANCES.get(goal_value, goal_value),
+        "fitness_level": request.fitness_level.value,
+        "hours": request.available_hours_per_week,
+        "current_week": request.current_week,
+    }
+    if request.focus_areas:
+        prompt += f"**Focus Areas**: {', '.join(request.focus_areas)}\n"
     return prompt
+
+
+def build_week_prompt(
+    request, first_week: int, last_week: int, phase: str, race_distance: str
+) -> str:
+    """Build the short per-call request for one week or a range of weeks.
+    
+    Args:
+        request: WorkoutRequest with training parameters
+        first_week, last_week: Week range to generate (equal for a single week)
+        phase: Periodization phase name
+        race_distance: Resolved race description (see RACE_DISTANCES)
+    """
+    if first_week == last_week:
+        weeks = f"Week {first_week}"
+    else:
+        weeks = f"Weeks {first_week}-{last_week}"
+    sport_type_value = request.sport_type.value if hasattr(request.sport_type, 'value') else request.sport_type
+    return WEEK_PROMPT_HEADER.format(
+        weeks=weeks,
+        duration_weeks=request.duration_weeks,
+        race_distance=race_distance,
+        phase=phase,
+        sport_type=sport_type_value,
+        fitness_level=request.fitness_level.value,
+        hours=request.available_hours_per_week,
+    )
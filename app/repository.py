@@ -1,5 +1,6 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+from sqlalchemy import Float, Row, Text, case, cast, func, insert, select, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 import json
 from app.database import SavedProgram, WorkoutHistory
@@ -10,57 +11,95 @@ class ProgramRepository:
     """Repository for managing training programs in the database."""
     
     @staticmethod
-    def save_program(db: Session, program: TrainingProgram, request_data: dict, user_id: Optional[int] = None) -> SavedProgram:
-        """Save a training program to the database."""
-        db_program = SavedProgram(
+    async def save_program(
+        db: AsyncSession,
+        program: TrainingProgram,
+        request_data: dict,
+        user_id: Optional[int] = None,
+        program_json: Optional[bytes] = None,
+    ) -> Tuple[Row, bytes]:
+        """Save a training program to the database.
+        
+        Pass `program_json` when the program has already been serialized.
+        Returns the generated (id, created_at) row and the program's JSON, so
+        callers can reuse the serialized program instead of dumping it again.
+        """
+        if program_json is None:
+            # UTF-8 bytes straight from pydantic-core, without model_dump_json's str copy
+            program_json = program.__pydantic_serializer__.to_json(program)
+        # RETURNING fetches the generated columns in the INSERT round trip (no refresh SELECT)
+        stmt = insert(SavedProgram).values(
             user_id=user_id,
             sport_type=request_data.get("sport_type", "triathlon"),  # Default to triathlon for backward compatibility
             goal=request_data["goal"],
             fitness_level=request_data["fitness_level"],
             duration_weeks=request_data["duration_weeks"],
             available_hours_per_week=request_data["available_hours_per_week"],
-            program_json=program.model_dump_json(),
+            program_json=program_json,
             notes=program.notes
-        )
-        db.add(db_program)
-        db.commit()
-        db.refresh(db_program)
-        return db_program
+        ).returning(SavedProgram.id, SavedProgram.created_at)
+        saved = (await db.execute(stmt)).one()
+        await db.commit()
+        return saved, program_json
     
     @staticmethod
-    def get_program(db: Session, program_id: int, user_id: Optional[int] = None) -> Optional[SavedProgram]:
-        """Retrieve a program by ID."""
-        query = db.query(SavedProgram).filter(SavedProgram.id == program_id)
+    async def get_program(db: AsyncSession, program_id: int, user_id: Optional[int] = None) -> Optional[Row]:
+        """Retrieve a program by ID.
+        
+        `program_json` is returned as the stored JSON text, unparsed, so it can
+        be passed straight through to the response.
+        """
+        stmt = select(
+            SavedProgram.id,
+            SavedProgram.created_at,
+            SavedProgram.goal,
+            SavedProgram.fitness_level,
+            SavedProgram.duration_weeks,
+            type_coerce(SavedProgram.program_json, Text).label("program_json"),
+        ).where(SavedProgram.id == program_id)
         if user_id is not None:
-            query = query.filter(SavedProgram.user_id == user_id)
-        return query.first()
+            stmt = stmt.where(SavedProgram.user_id == user_id)
+        return (await db.execute(stmt)).first()
     
     @staticmethod
-    def list_programs(
-        db: Session, 
+    async def list_programs(
+        db: AsyncSession, 
         skip: int = 0, 
         limit: int = 100,
         goal: Optional[str] = None,
         user_id: Optional[int] = None
-    ) -> List[SavedProgram]:
-        """List all saved programs with optional filtering."""
-        query = db.query(SavedProgram)
+    ) -> List[Row]:
+        """List all saved programs with optional filtering.
+        
+        Returns lightweight rows with the listing columns only; the program
+        JSON is loaded by get_program.
+        """
+        stmt = select(
+            SavedProgram.id,
+            SavedProgram.created_at,
+            SavedProgram.goal,
+            SavedProgram.fitness_level,
+            SavedProgram.duration_weeks,
+            SavedProgram.available_hours_per_week,
+            SavedProgram.notes,
+        )
         if user_id is not None:
-            query = query.filter(SavedProgram.user_id == user_id)
+            stmt = stmt.where(SavedProgram.user_id == user_id)
         if goal:
-            query = query.filter(SavedProgram.goal == goal)
-        return query.order_by(SavedProgram.created_at.desc()).offset(skip).limit(limit).all()
+            stmt = stmt.where(SavedProgram.goal == goal)
+        stmt = stmt.order_by(SavedProgram.created_at.desc()).offset(skip).limit(limit)
+        return (await db.execute(stmt)).all()
     
     @staticmethod
-    def delete_program(db: Session, program_id: int, user_id: Optional[int] = None) -> bool:
+    async def delete_program(db: AsyncSession, program_id: int, user_id: Optional[int] = None) -> bool:
         """Delete a program by ID."""
-        query = db.query(SavedProgram).filter(SavedProgram.id == program_id)
+        stmt = select(SavedProgram).where(SavedProgram.id == program_id)
         if user_id is not None:
-            query = query.filter(SavedProgram.user_id == user_id)
-        program = query.first()
+            stmt = stmt.where(SavedProgram.user_id == user_id)
+        program = (await db.execute(stmt)).scalars().first()
         if program:
-            db.delete(program)
-            db.commit()
+            await db.delete(program)
+            await db.commit()
             return True
         return False
 
@@ -69,8 +108,8 @@ class WorkoutHistoryRepository:
     """Repository for managing workout history."""
     
     @staticmethod
-    def log_workout(
-        db: Session,
+    async def log_workout(
+        db: AsyncSession,
         program_id: Optional[int],
         sport: str,
         title: str,
@@ -79,9 +118,9 @@ class WorkoutHistoryRepository:
         notes: Optional[str],
         rating: Optional[int],
         user_id: Optional[int] = None
-    ) -> WorkoutHistory:
-        """Log a completed workout."""
-        workout = WorkoutHistory(
+    ) -> Row:
+        """Log a completed workout. Returns the generated (id, completed_at) row."""
+        stmt = insert(WorkoutHistory).values(
             user_id=user_id,
             program_id=program_id,
             sport=sport,
@@ -90,58 +129,62 @@ class WorkoutHistoryRepository:
             distance_km=distance_km,
             notes=notes,
             rating=rating
-        )
-        db.add(workout)
-        db.commit()
-        db.refresh(workout)
+        ).returning(WorkoutHistory.id, WorkoutHistory.completed_at)
+        workout = (await db.execute(stmt)).one()
+        await db.commit()
         return workout
     
     @staticmethod
-    def get_workout_history(
-        db: Session,
+    async def get_workout_history(
+        db: AsyncSession,
         program_id: Optional[int] = None,
         sport: Optional[str] = None,
         skip: int = 0,
         limit: int = 100,
         user_id: Optional[int] = None
-    ) -> List[WorkoutHistory]:
-        """Retrieve workout history with optional filtering."""
-        query = db.query(WorkoutHistory)
+    ) -> List[Row]:
+        """Retrieve workout history rows with optional filtering."""
+        stmt = select(
+            WorkoutHistory.id,
+            WorkoutHistory.completed_at,
+            WorkoutHistory.sport,
+            WorkoutHistory.title,
+            WorkoutHistory.duration_minutes,
+            WorkoutHistory.distance_km,
+            WorkoutHistory.notes,
+            WorkoutHistory.rating,
+        )
         if user_id is not None:
-            query = query.filter(WorkoutHistory.user_id == user_id)
+            stmt = stmt.where(WorkoutHistory.user_id == user_id)
         if program_id:
-            query = query.filter(WorkoutHistory.program_id == program_id)
+            stmt = stmt.where(WorkoutHistory.program_id == program_id)
         if sport:
-            query = query.filter(WorkoutHistory.sport == sport)
-        return query.order_by(WorkoutHistory.completed_at.desc()).offset(skip).limit(limit).all()
+            stmt = stmt.where(WorkoutHistory.sport == sport)
+        stmt = stmt.order_by(WorkoutHistory.completed_at.desc()).offset(skip).limit(limit)
+        return (await db.execute(stmt)).all()
     
     @staticmethod
-    def get_workout_stats(db: Session, sport: Optional[str] = None, user_id: Optional[int] = None) -> dict:
-        """Get aggregate statistics for workouts."""
-        query = db.query(WorkoutHistory)
+    async def get_workout_stats(db: AsyncSession, sport: Optional[str] = None, user_id: Optional[int] = None) -> dict:
+        """Get aggregate statistics for workouts, computed in a single SQL query."""
+        stmt = select(
+            func.count(WorkoutHistory.id),
+            func.coalesce(func.sum(WorkoutHistory.duration_minutes), 0),
+            func.coalesce(func.sum(WorkoutHistory.distance_km), 0.0),
+            # Average over rated workouts only (a rating of 0 still counts). CASE rather
+            # than AVG(...) FILTER, which SQL Server doesn't support; cast so SQL
+            # Server doesn't truncate the average to an integer.
+            func.avg(case((WorkoutHistory.rating.isnot(None), cast(WorkoutHistory.rating, Float)))),
+        )
         if user_id is not None:
-            query = query.filter(WorkoutHistory.user_id == user_id)
+            stmt = stmt.where(WorkoutHistory.user_id == user_id)
         if sport:
-            query = query.filter(WorkoutHistory.sport == sport)
-        
-        workouts = query.all()
-        
-        if not workouts:
-            return {
-                "total_workouts": 0,
-                "total_duration_minutes": 0,
-                "total_distance_km": 0,
-                "average_rating": 0
-            }
+            stmt = stmt.where(WorkoutHistory.sport == sport)
         
-        total_duration = sum(w.duration_minutes for w in workouts)
-        total_distance = sum(w.distance_km or 0 for w in workouts)
-        ratings = [w.rating for w in workouts if w.rating]
-        avg_rating = sum(ratings) / len(ratings) if ratings else 0
+        total_workouts, total_duration, total_distance, avg_rating = (await db.execute(stmt)).one()
         
         return {
-            "total_workouts": len(workouts),
+            "total_workouts": total_workouts,
             "total_duration_minutes": total_duration,
             "total_distance_km": round(total_distance, 2),
-            "average_rating": round(avg_rating, 2)
+            "average_rating": round(avg_rating or 0, 2)
         }
@@ -372,6 +372,7 @@ Write-Host "   Database connection configured (using Managed Identity)" -Foregro
 # Build settings JSON
 $settings = @{
     "LLM_PROVIDER" = "azure_ai"
+    "ENVIRONMENT" = "production"
     # Use AZURE_AI_* variables (required by the application)
     # v1 API: No longer requires api_version parameter!
     "AZURE_AI_ENDPOINT" = $OPENAI_ENDPOINT
@@ -434,6 +435,7 @@ if (Test-Path "deploy_package.zip") {
 # Include all necessary files
 $filesToDeploy = @(
     "app",
+    "alembic.ini",
     "requirements.txt",
     "startup.sh",
     ".deployment"
@@ -6,12 +6,25 @@ SPDX-License-Identifier: AGPL-3.0-or-later
 """
 
 import os
+import platform
 import sys
+import shutil
 import subprocess
-import json
+import zipfile
 import argparse
+import io
+from contextlib import redirect_stdout
+from functools import lru_cache
 from pathlib import Path
-from typing import Tuple, List
+from typing import Tuple, List, Optional, Set
+
+
+# Directories never included in the deployment package
+_SKIP_DIRS = frozenset({"__pycache__", ".git", ".venv", "node_modules", ".pytest_cache"})
+
+# Only the two fields shown, as plain text (one value per line) rather than
+# the full JSON account
+AZ_ACCOUNT_SHOW = ("account", "show", "--query", "[user.name, name]", "-o", "tsv")
 
 
 class DeploymentHelper:
@@ -23,6 +36,45 @@ class DeploymentHelper:
         self.app_dir = self.project_root / "app"
         self.requirements_file = self.project_root / "requirements.txt"
         self.startup_script = self.project_root / "startup.sh"
+        self._az_processes = {}
+        self._az_results = {}
+
+    def _start_az(self, *args: str) -> None:
+        """Start an Azure CLI command in the background, if not already started.
+
+        A failure to launch is kept and raised from _run_az, inside the check
+        that needs the result.
+        """
+        if args in self._az_processes:
+            return
+        # Use the resolved path: on Windows az is az.cmd, which Popen can't find by bare name
+        az_path = self._find_command("az")
+        try:
+            if az_path is None:
+                raise FileNotFoundError("Azure CLI (az) not found in PATH")
+            self._az_processes[args] = subprocess.Popen(
+                [az_path, *args],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+        except OSError as e:
+            self._az_processes[args] = e
+
+    def _run_az(self, *args: str) -> Tuple[int, str]:
+        """Run an Azure CLI command once and return (returncode, stdout).
+
+        Repeated calls reuse the first result; commands started earlier with
+        _start_az are waited on rather than run again.
+        """
+        if args not in self._az_results:
+            self._start_az(*args)
+            process = self._az_processes[args]
+            if isinstance(process, OSError):
+                raise process
+            stdout, _ = process.communicate()
+            self._az_results[args] = (process.returncode, stdout)
+        return self._az_results[args]
 
     def check_prerequisites(self) -> bool:
         """Check if all prerequisites are installed."""
@@ -35,15 +87,11 @@ class DeploymentHelper:
         if not self._command_exists("az"):
             missing.append("Azure CLI (https://aka.ms/azcli)")
         else:
-            version = subprocess.check_output(["az", "--version"]).decode().split("\n")[0]
+            version = self._run_az("--version")[1].split("\n")[0]
             print(f"✅ Azure CLI: {version}")
 
-        # Check Python
-        try:
-            version = subprocess.check_output([sys.executable, "--version"]).decode().strip()
-            print(f"✅ Python: {version}")
-        except Exception:
-            missing.append("Python 3.8+")
+        # Check Python (the interpreter running this script)
+        print(f"✅ Python: Python {platform.python_version()}")
 
         # Check Git (optional but recommended)
         if self._command_exists("git"):
@@ -66,17 +114,21 @@ class DeploymentHelper:
         print("📁 Validating project structure...")
         print()
 
+        # One directory listing each instead of a stat per file
+        root_entries = self._dir_entries(self.project_root)
+        app_entries = self._dir_entries(self.app_dir)
+
         required_files = [
-            (self.app_dir, "App directory"),
-            (self.app_dir / "main.py", "main.py"),
-            (self.requirements_file, "requirements.txt"),
-            (self.startup_script, "startup.sh"),
-            (self.project_root / ".deployment", ".deployment"),
+            (root_entries, self.app_dir.name, "App directory"),
+            (app_entries, "main.py", "main.py"),
+            (root_entries, self.requirements_file.name, "requirements.txt"),
+            (root_entries, self.startup_script.name, "startup.sh"),
+            (root_entries, ".deployment", ".deployment"),
         ]
 
         missing = []
-        for file_path, description in required_files:
-            if file_path.exists():
+        for entries, name, description in required_files:
+            if name in entries:
                 print(f"✅ {description}")
             else:
                 print(f"❌ {description}")
@@ -99,13 +151,12 @@ class DeploymentHelper:
 
         try:
             with open(self.requirements_file) as f:
-                requirements = [
-                    line.strip()
-                    for line in f
-                    if line.strip() and not line.startswith("#")
-                ]
+                count = sum(
+                    1 for line in f
+                    if (stripped := line.strip()) and not stripped.startswith("#")
+                )
 
-            print(f"Found {len(requirements)} dependencies")
+            print(f"Found {count} dependencies")
 
             # Try to validate with pip (if venv is active)
             try:
@@ -131,40 +182,56 @@ class DeploymentHelper:
         print()
 
         try:
-            import zipfile
-
             output_path = self.project_root / output_file
 
             # Remove existing package
-            if output_path.exists():
+            try:
                 output_path.unlink()
                 print(f"Removed existing {output_file}")
+            except FileNotFoundError:
+                pass
 
             # Files to include
             files_to_zip = [
                 ("app", "app"),
+                ("alembic.ini", "alembic.ini"),
                 ("requirements.txt", "requirements.txt"),
                 ("startup.sh", "startup.sh"),
                 (".deployment", ".deployment"),
             ]
 
             # Create zip file
-            with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zf:
-                for source, arcname in files_to_zip:
-                    source_path = self.project_root / source
-
-                    if source_path.is_dir():
-                        for file_path in source_path.rglob("*"):
-                            if file_path.is_file():
-                                zf.write(
-                                    file_path,
-                                    arcname=Path(arcname) / file_path.relative_to(source_path),
-                                )
-                    else:
-                        zf.write(source_path, arcname=arcname)
-
-            size_mb = output_path.stat().st_size / (1024 * 1024)
-            print(f"✅ Package created: {output_path} ({size_mb:.2f} MB)")
+            # - Level 1 deflate: much faster than the default, slightly larger archive
+            # - Sorted entries for reproducible packages; bytecode caches left out
+            # - Written through our own file handle so the final size comes from
+            #   tell() instead of a stat afterwards
+            with open(output_path, "wb") as f:
+                with zipfile.ZipFile(f, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+                    for source, arcname in files_to_zip:
+                        source_path = self.project_root / source
+
+                        if source_path.is_dir():
+                            # Archive names are sliced off the walked paths as plain strings
+                            source_str = str(source_path)
+                            prefix_len = len(source_str) + 1
+                            for dirpath, dirnames, filenames in os.walk(source_str):
+                                # Prune in place so skipped trees are never descended into
+                                dirnames[:] = sorted(d for d in dirnames if d not in _SKIP_DIRS)
+                                for filename in sorted(filenames):
+                                    if filename.endswith(".pyc"):
+                                        continue
+                                    full_path = os.path.join(dirpath, filename)
+                                    zf.write(
+                                        full_path,
+                                        arcname=arcname + "/" + full_path[prefix_len:].replace(os.sep, "/"),
+                                        compress_type=zipfile.ZIP_DEFLATED,
+                                    )
+                        else:
+                            zf.write(source_path, arcname=arcname, compress_type=zipfile.ZIP_DEFLATED)
+                    uncompressed_mb = sum(info.file_size for info in zf.infolist()) / (1024 * 1024)
+                size_mb = f.tell() / (1024 * 1024)
+
+            print(f"✅ Package created: {output_path} ({size_mb:.2f} MB, {uncompressed_mb:.2f} MB uncompressed)")
             print()
             return True
 
@@ -178,17 +245,12 @@ class DeploymentHelper:
         print()
 
         try:
-            result = subprocess.run(
-                ["az", "account", "show"],
-                capture_output=True,
-                text=True,
-                check=False,
-            )
+            returncode, stdout = self._run_az(*AZ_ACCOUNT_SHOW)
 
-            if result.returncode == 0:
-                account = json.loads(result.stdout)
-                print(f"✅ Logged in as: {account.get('user', {}).get('name', 'Unknown')}")
-                print(f"   Subscription: {account.get('name', 'Unknown')}")
+            if returncode == 0:
+                user_name, subscription = (stdout.splitlines() + ["", ""])[:2]
+                print(f"✅ Logged in as: {user_name or 'Unknown'}")
+                print(f"   Subscription: {subscription or 'Unknown'}")
                 print()
                 return True
             else:
@@ -224,17 +286,24 @@ class DeploymentHelper:
             return True
 
     @staticmethod
-    def _command_exists(command: str) -> bool:
-        """Check if a command exists in PATH."""
+    def _dir_entries(path: Path) -> Set[str]:
+        """Return the names in a directory, or an empty set if it can't be read."""
         try:
-            subprocess.run(
-                ["where" if os.name == "nt" else "which", command],
-                capture_output=True,
-                check=True,
-            )
-            return True
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            return False
+            with os.scandir(path) as it:
+                return {entry.name for entry in it}
+        except OSError:
+            return set()
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _find_command(command: str) -> Optional[str]:
+        """Return the full path of a command in PATH, or None."""
+        return shutil.which(command)
+
+    @classmethod
+    def _command_exists(cls, command: str) -> bool:
+        """Check if a command exists in PATH."""
+        return cls._find_command(command) is not None
 
     def run_all_checks(self) -> bool:
         """Run all validation checks."""
@@ -251,14 +320,25 @@ class DeploymentHelper:
             ("Configuration", self.validate_env_file),
         ]
 
+        # The Azure CLI is slow to start; launch both az calls up front so
+        # they overlap with each other and with the local checks
+        if self._command_exists("az"):
+            self._start_az("--version")
+            self._start_az(*AZ_ACCOUNT_SHOW)
+
         results = []
         for name, check_func in checks:
+            # Collect each check's output and write it in one go
+            output = io.StringIO()
             try:
-                result = check_func()
+                with redirect_stdout(output):
+                    result = check_func()
                 results.append((name, result))
             except Exception as e:
-                print(f"❌ Error during {name} check: {e}")
+                print(f"❌ Error during {name} check: {e}", file=output)
                 results.append((name, False))
+            sys.stdout.write(output.getvalue())
+            sys.stdout.flush()
 
         print()
         print("=" * 50)